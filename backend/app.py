@@ -1,11 +1,41 @@
-from flask import Flask, request, jsonify, send_file, Response, stream_with_context
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import pandas as pd
+import numpy as np
 from fpdf import FPDF
 import os
 import re
+import sys
+import math
+import time
+import pickle
+import sqlite3
+import base64
+import hashlib
+import hmac
+import io
+import csv
+import json
+import zipfile
+import shutil
+import threading
+import random
+import statistics
 import unicodedata
+import tracemalloc
+from types import MappingProxyType
+from contextlib import closing
+from urllib.parse import quote
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from itertools import repeat
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+import openpyxl
+from pandas.io.parsers import TextParser
 from openai import OpenAI
+import click
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -13,20 +43,452 @@ CORS(app)  # Enable CORS for all routes
 # Path to the local Excel file
 file_path = "symposiumfile.xlsx"
 
-# Global variable to store fetched data
-fetched_data = {}
+# Sheets loaded from the workbook, in display order. This is also the load priority:
+# Prevalence backs the home page lists, so it is parsed and published first.
+SHEETS_TO_LOAD = [
+    "Prevalence",
+    "Publications",
+    "Classification",
+    "Symptoms",
+    "Inheritance",
+    "Genetic Variation",
+    "Approved Treatments",
+    "Biopharma Pipeline",
+]
+
+# The current dataset: an immutable snapshot of the parsed sheets and their version.
+# Reloads build a complete replacement off to the side and publish it with a single
+# reference assignment, so in-flight requests finish on the version they started with.
+# While the first load is running, partial datasets (complete=False) are published sheet by sheet.
+dataset = {"version": None, "content_hash": None, "sheets": MappingProxyType({}), "failed_sheets": {},
+           "load_timings_ms": {}, "loaded_at": None, "complete": False,
+           "disease_ids": {}, "disease_names": [], "name_index": {},
+           "suggestion_keys": [], "suggestion_names": [], "disease_keys": [], "trigram_index": {},
+           "fulltext_index": None, "catalogue": {"bodies": {}, "lists": {}, "disease_count": 0},
+           "prevalence_index": None, "documents": None, "pdf_items": None}
+
+# Parsed sheets are pickled here, keyed by the workbook's content hash, so that
+# cold starts skip openpyxl entirely unless the workbook actually changed.
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", ".cache")
+# Bump whenever the layout of the pickled snapshot changes.
+SNAPSHOT_FORMAT_VERSION = 2
+# The snapshot also holds output of the ingest and index code (sheet notes, link formatting,
+# tokenizing, ...), so it is keyed by a hash of this file too: any code change rebuilds it.
+with open(__file__, "rb") as source:
+    INGEST_FINGERPRINT = hashlib.sha256(source.read()).hexdigest()[:16]
+
+# Processes used to parse sheets in parallel on a snapshot miss (0 = one per available core)
+LOAD_WORKERS = int(os.getenv("LOAD_WORKERS", "0"))
+
+# Seconds between checks of the workbook's mtime for hot reload (0 disables polling the workbook)
+RELOAD_POLL_SECONDS = float(os.getenv("RELOAD_POLL_SECONDS", "30"))
+# /admin/reload touches this marker and every process's watcher checks it each second, so a reload
+# reaches all gunicorn workers instead of only the one that served the request
+RELOAD_MARKER_PATH = os.getenv("RELOAD_MARKER_PATH", os.path.join(SNAPSHOT_DIR, "reload-requested"))
+RELOAD_MARKER_POLL_SECONDS = 1
+
+# Shared secret for the /admin endpoints; they are disabled when unset
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Rendered PDF reports are cached by content key (dataset version + disease + title): an
+# in-memory LRU holding at most PDF_CACHE_BYTES, and, when PDF_CACHE_DIR is set, a disk
+# tier that survives restarts. Both are dropped when a new dataset version is published.
+PDF_CACHE_BYTES = int(os.getenv("PDF_CACHE_BYTES", str(64 * 1024 * 1024)))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR")
+pdf_cache = OrderedDict()
+pdf_cache_size = 0
+pdf_cache_stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+pdf_cache_lock = threading.Lock()
+
+# Reports rendered at once per process (each holds its whole document in memory), and how
+# long a download waits for a render slot before getting a 503
+PDF_RENDER_CONCURRENCY = int(os.getenv("PDF_RENDER_CONCURRENCY", "2"))
+PDF_RENDER_WAIT_SECONDS = float(os.getenv("PDF_RENDER_WAIT_SECONDS", "10"))
+pdf_render_slots = threading.BoundedSemaphore(PDF_RENDER_CONCURRENCY)
+# Bulk report export: most diseases per request, processes in the shared report pool (0 = one per core),
+# exports using the pool at once, and exports of at most this many diseases, which are rendered
+# in-process under one of pdf_render_slots instead
+MAX_BULK_REPORTS = int(os.getenv("MAX_BULK_REPORTS", "1000"))
+BULK_REPORT_WORKERS = int(os.getenv("BULK_REPORT_WORKERS", "0"))
+BULK_EXPORT_CONCURRENCY = int(os.getenv("BULK_EXPORT_CONCURRENCY", "1"))
+BULK_INPROCESS_REPORTS = int(os.getenv("BULK_INPROCESS_REPORTS", "20"))
+bulk_export_slots = threading.BoundedSemaphore(BULK_EXPORT_CONCURRENCY)
+# Created on the first large export and kept for the life of the process
+report_pool = None
+report_pool_workers = 0
+report_pool_lock = threading.Lock()
+pdf_render_stats = {"renders": 0, "rejected": 0, "max_render_ms": 0.0, "max_report_bytes": 0}
+
+# Serializes dataset builds: the first load in a process and any later reload
+dataset_lock = threading.Lock()
+# Notified whenever a new (possibly partial) dataset is published
+dataset_published = threading.Condition()
+loader_thread = None
+watcher_thread = None
+# The workbook a sheet-parsing worker process opened in init_sheet_worker
+sheet_worker_workbook = None
+
+# How long a request waits for a sheet that is still loading before getting a 503
+SHEET_WAIT_SECONDS = float(os.getenv("SHEET_WAIT_SECONDS", "2"))
+# Retry-After sent with 503s while the dataset is loading
+RETRY_AFTER_SECONDS = 5
+
+# Default and maximum number of autocomplete suggestions per request
+DEFAULT_SUGGESTIONS = 10
+MAX_SUGGESTIONS = 50
+
+# Fuzzy name search: query trigrams found in more than this fraction of names (e.g. "syn")
+# are too common to narrow the candidates, at most FUZZY_MAX_CANDIDATES are rescored, and
+# matches scoring below FUZZY_MIN_SCORE are dropped
+FUZZY_COMMON_TRIGRAM_FRACTION = 0.05
+FUZZY_MAX_CANDIDATES = 200
+FUZZY_MIN_SCORE = 0.35
+
+# Full-text search: BM25 parameters, words too common to index, and result limits
+BM25_K1 = 1.2
+BM25_B = 0.75
+FULLTEXT_STOPWORDS = frozenset("a an and are as at be by for from in into is it its of on or that the to with".split())
+DEFAULT_FULLTEXT_RESULTS = 20
+MAX_FULLTEXT_RESULTS = 100
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+URL_PATTERN = re.compile(r'https?:\/\/\S+')
+BOLD_PATTERN = re.compile(r'\*\*(.*?)\*\*')
+# Streamed chatbot answers are cut into segments only after a space or tab followed by more text
+CHAT_CUT_PATTERN = re.compile(r'[ \t](?=\S)')
+NON_ASCII_PATTERN = re.compile(r'[^\x00-\x7F]+')
+LONG_SPACE_PATTERN = re.compile(r' {10,}')
+
+# Prevalence figures per 100,000, optionally marked BP (birth prevalence) and/or * (European data).
+# Counts such as "3 Cases" or "2 Families" are not rates and are left unparsed.
+PREVALENCE_COLUMN = "Estimated prevalence(/100,000)"
+PREVALENCE_PATTERN = r"^\s*(?P<value>\d[\d,]*(?:\.\d+)?)\s*(?P<birth>BP)?\s*(?P<european>\*)?\s*$"
+DEFAULT_PREVALENCE_RESULTS = 100
+MAX_PREVALENCE_RESULTS = 1000
+
+# Notes appended to a sheet's records, and the Publications column left out of them
+SHEET_NOTES = {
+    "Inheritance": "Not applicable is used for diseases that are not inherited. "
+                   "Unknown is applied when the mode of inheritance is not yet determined. "
+                   "Multigenic/multifactorial describes disorders where a combination of one or more genes "
+                   "and/or environmental factors contributes to the expression of the phenotype.",
+    "Prevalence": "Without specification published figures are worldwide | An asterisk * indicates European data | BP indicates birth prevalence.",
+}
+PUBLICATIONS_COUNT_COLUMN = "Number of Approximate Publications in Last Five Years (Searching in Title/Abstract on Pubmed)"
+# Sheets whose URLs are shown as "Click Link" labels, and the list the Biopharma Pipeline
+# "Unnamed" columns are collapsed into
+LINK_SHEETS = ["Biopharma Pipeline", "Publications", "Approved Treatments"]
+PIPELINE_COLUMN = "Pipeline"
+
+# Page size when a client sends a cursor without a limit, and the largest page served
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
 
 # OpenRouter API configuration for DeepSeek
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 deepseek_client = None
 if OPENROUTER_API_KEY:
     deepseek_client = OpenAI(api_key=OPENROUTER_API_KEY, base_url="https://openrouter.ai/api/v1")
+LLM_MODEL = "deepseek/deepseek-chat-v3.1"
+
+# Prompt templates of the per-disease AI features; {disease} is filled in per request
+AI_DATA_PROMPT = {
+    "system": "You are a medical data generator assistant.",
+    "user": "Generate 10 concise lines of hypothetical data about the disease '{disease}' "
+            "including prevalence, symptoms, treatments, or research insights. Format each line as a sentence.",
+    "max_tokens": 300,
+    "temperature": 0.7,
+}
+GEOGRAPHIC_SPREAD_PROMPT = {
+    "system": "You are a helpful assistant that outputs only country names.",
+    "user": "List 10 countries where the disease '{disease}' is most commonly found based on prevalence. "
+            "Respond only with the country names separated by commas.",
+    "max_tokens": 100,
+    "temperature": 0.5,
+}
+
+# Completions of those prompts are cached in SQLite, shared by all workers and kept across
+# restarts, keyed by normalized disease, template, model and parameters ("" disables it)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(SNAPSHOT_DIR, "llm_cache.sqlite3"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+llm_cache_ready = False
+llm_cache_stats = {"hits": 0, "misses": 0, "stores": 0, "errors": 0}
+llm_cache_lock = threading.Lock()
+
+# Upstream calls in flight, by cache key: concurrent requests for the same prompt follow one
+# call instead of each making their own
+llm_flights = {}
+llm_flights_lock = threading.Lock()
+llm_call_stats = {"upstream_calls": 0, "coalesced": 0, "rejected": 0}
+
+# Each worker makes at most LLM_MAX_CONCURRENT upstream AI calls at once, each on a thread of
+# its own pool, and at most LLM_MAX_WAITERS requests wait on them (following a call someone
+# else started costs no extra slot). Every waiting request holds one of the worker's
+# GUNICORN_THREADS request threads, so the waiters are capped LLM_RESERVED_THREADS below that
+# and further uncached AI requests get a 503 right away: those threads stay free for dataset
+# lookups however slow the upstream is.
+LLM_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", "4"))
+GUNICORN_THREADS = int(os.getenv("GUNICORN_THREADS", "8"))
+LLM_RESERVED_THREADS = int(os.getenv("LLM_RESERVED_THREADS", "2"))
+LLM_WAITER_LIMIT = max(GUNICORN_THREADS - LLM_RESERVED_THREADS, 1)
+LLM_MAX_WAITERS = int(os.getenv("LLM_MAX_WAITERS", str(LLM_WAITER_LIMIT)))
+if LLM_MAX_WAITERS > LLM_WAITER_LIMIT:
+    print(f"✗ LLM_MAX_WAITERS={LLM_MAX_WAITERS} would let AI requests take the request threads kept for "
+          f"lookups (GUNICORN_THREADS={GUNICORN_THREADS}, LLM_RESERVED_THREADS={LLM_RESERVED_THREADS}); "
+          f"using {LLM_WAITER_LIMIT}.")
+    LLM_MAX_WAITERS = LLM_WAITER_LIMIT
+llm_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENT, thread_name_prefix="llm-call")
+llm_upstream_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENT)
+llm_waiter_slots = threading.BoundedSemaphore(LLM_MAX_WAITERS)
+
+# Chatbot grounding: rows of these sheets about the diseases a question names, in priority order
+CHAT_CONTEXT_SHEETS = ["Prevalence", "Inheritance", "Approved Treatments", "Symptoms"]
+# Hard budget of that context in estimated tokens (about four characters each)
+CHAT_CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "600"))
+CHAT_MAX_DISEASES = 3
+# A disease counts as named when the question holds this share of its name's trigrams
+# (all of them for short names, which would otherwise match inside other words)
+CHAT_MENTION_MIN_SCORE = 0.8
+CHAT_PLACEHOLDERS = frozenset(["", "N/A", "No details available", "No results found"])
+chat_context_stats = {"requests": 0, "grounded": 0, "retrieval_ms_total": 0.0, "max_retrieval_ms": 0.0,
+                      "prompt_tokens_total": 0, "max_prompt_tokens": 0}
+chat_context_lock = threading.Lock()
+
+# Chatbot answers are reused for rephrasings of a question: same diseases named and this
+# trigram similarity between the questions once filler words are dropped (0 entries disables it)
+CHAT_CACHE_MIN_SIMILARITY = float(os.getenv("CHAT_CACHE_MIN_SIMILARITY", "0.8"))
+CHAT_CACHE_TTL_SECONDS = float(os.getenv("CHAT_CACHE_TTL_SECONDS", str(24 * 3600)))
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "2000"))
+CHAT_FILLER_WORDS = frozenset("about can could describe do does explain give i info information know me "
+                              "please s some tell what whats would you".split())
+# Entries by (diseases, question key), least recently used first, and the keys cached per diseases
+chat_cache = OrderedDict()
+chat_cache_buckets = {}
+chat_cache_stats = {"hits": 0, "near_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+chat_cache_lock = threading.Lock()
+
+# Country gazetteer (ISO code, name, centroid and aliases of every country) that places the
+# country names the AI answers with on the map
+GAZETTEER_PATH = "countries.csv"
+# A country name that is no known alias must score this high on trigram overlap (Jaccard) to
+# resolve. Coverage-weighted scores as in fuzzy_match would place "Africa" in South Africa.
+COUNTRY_MIN_SCORE = 0.5
+# Regions the AI answers with that are no country and must not be matched to one (canonical form)
+NON_COUNTRY_PLACES = {
+    "africa", "north africa", "northern africa", "west africa", "western africa", "east africa",
+    "eastern africa", "central africa", "southern africa", "sub saharan africa", "europe", "northern europe",
+    "western europe", "eastern europe", "southern europe", "central europe", "scandinavia", "balkans",
+    "mediterranean", "asia", "east asia", "south asia", "southeast asia", "south east asia", "central asia",
+    "middle east", "americas", "north america", "central america", "south america", "latin america",
+    "caribbean", "oceania", "worldwide", "global",
+}
+# Geographic spread per disease, filled offline by `flask precompute-spread` and served from
+# memory; the AI is only called live for diseases missing from it
+GEOGRAPHIC_SPREAD_PATH = os.getenv("GEOGRAPHIC_SPREAD_PATH", "geographic_spread.json")
+gazetteer = None
+geographic_spread = None
+geographic_spread_stats = {"precomputed": 0, "live": 0}
+geographic_lock = threading.Lock()
+
+class LLMBusy(Exception):
+    """Raised when an AI request would exceed this worker's cap on upstream calls or on requests waiting on them."""
+
+def llm_busy(**fields):
+    """503 response for AI requests turned away while every slot is taken (fields: endpoint-specific keys)."""
+    response = jsonify({"error": "The AI service is busy. Please retry shortly.", **fields})
+    return response, 503, {"Retry-After": str(RETRY_AFTER_SECONDS)}
+
+def llm_cache_connect():
+    """Open the response cache database, creating it on first use."""
+    global llm_cache_ready
+    if not llm_cache_ready:
+        # SQLite creates the file but not its directory
+        os.makedirs(os.path.dirname(LLM_CACHE_PATH) or ".", exist_ok=True)
+    connection = sqlite3.connect(LLM_CACHE_PATH, timeout=5)
+    if not llm_cache_ready:
+        # WAL lets gunicorn workers read while another one writes
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, chunks TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        llm_cache_ready = True
+    return connection
+
+def llm_cache_count(stat):
+    """Bump one of the response cache counters."""
+    with llm_cache_lock:
+        llm_cache_stats[stat] += 1
+
+def llm_cache_key(template, disease):
+    """Cache key of a completion: normalized disease, prompt template, model and parameters, hashed."""
+    parts = {"model": LLM_MODEL, "disease": normalize_disease_name(disease), **template}
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+def llm_cache_get(key):
+    """Cached completion chunks for key, or None when missing, expired or the cache is unavailable."""
+    if not LLM_CACHE_PATH:
+        return None
+    now = time.time()
+    try:
+        with closing(llm_cache_connect()) as connection, connection:
+            row = connection.execute("SELECT chunks FROM llm_cache WHERE key = ? AND created_at >= ?",
+                                     (key, now - LLM_CACHE_TTL_SECONDS)).fetchone()
+            if row is not None:
+                connection.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+    except (sqlite3.Error, OSError) as e:
+        print(f"✗ LLM cache read failed: {e}")
+        llm_cache_count("errors")
+        return None
+    llm_cache_count("hits" if row is not None else "misses")
+    return json.loads(row[0]) if row is not None else None
+
+def llm_cache_put(key, chunks):
+    """Store completion chunks, then drop expired entries and the least recently used beyond the cap."""
+    if not LLM_CACHE_PATH or not "".join(chunks).strip():
+        return
+    now = time.time()
+    try:
+        with closing(llm_cache_connect()) as connection, connection:
+            connection.execute("INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)", (key, json.dumps(chunks), now, now))
+            connection.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - LLM_CACHE_TTL_SECONDS,))
+            connection.execute("DELETE FROM llm_cache WHERE key IN "
+                               "(SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                               (LLM_CACHE_MAX_ENTRIES,))
+    except (sqlite3.Error, OSError) as e:
+        print(f"✗ LLM cache write failed: {e}")
+        llm_cache_count("errors")
+        return
+    llm_cache_count("stores")
+
+def llm_cache_info():
+    """Response cache counters, for /health."""
+    with llm_cache_lock:
+        return {"enabled": bool(LLM_CACHE_PATH), "ttl_seconds": LLM_CACHE_TTL_SECONDS,
+                "max_entries": LLM_CACHE_MAX_ENTRIES, **llm_cache_stats}
+
+def llm_completion(template, disease):
+    """Keyword arguments of the chat completion of a prompt template for one disease."""
+    return {
+        "model": LLM_MODEL,
+        "messages": [
+            {"role": "system", "content": template["system"]},
+            {"role": "user", "content": template["user"].format(disease=disease)},
+        ],
+        "max_tokens": template["max_tokens"],
+        "temperature": template["temperature"],
+    }
+
+def run_llm_flight(key, flight, completion, cache):
+    """Stream one upstream completion into a flight, caching it if asked to and it finished cleanly."""
+    try:
+        response = deepseek_client.chat.completions.create(**completion, stream=True)
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                with flight["changed"]:
+                    flight["chunks"].append(chunk.choices[0].delta.content)
+                    flight["changed"].notify_all()
+    except Exception as e:
+        flight["error"] = e
+    finally:
+        # Cache before retiring the flight, so later requests find the completion either way
+        if cache and flight["error"] is None:
+            llm_cache_put(key, flight["chunks"])
+        with llm_flights_lock:
+            llm_flights.pop(key, None)
+        # Free the upstream slot before followers see the end, so they can start the next call
+        llm_upstream_slots.release()
+        with flight["changed"]:
+            flight["done"] = True
+            flight["changed"].notify_all()
+
+def join_llm_flight(key, completion, cache):
+    """The in-flight upstream call for key, starting one if there is none.
+
+    Starting a call takes an upstream slot, which the call gives back when it ends; raises
+    LLMBusy when none is free. Joining a call in flight needs none.
+    """
+    with llm_flights_lock:
+        flight = llm_flights.get(key)
+        if flight is not None:
+            llm_call_stats["coalesced"] += 1
+            return flight
+        if not llm_upstream_slots.acquire(blocking=False):
+            llm_call_stats["rejected"] += 1
+            raise LLMBusy()
+        flight = {"chunks": [], "done": False, "error": None, "changed": threading.Condition()}
+        llm_flights[key] = flight
+        llm_call_stats["upstream_calls"] += 1
+    llm_executor.submit(run_llm_flight, key, flight, completion, cache)
+    return flight
+
+def follow_llm_flight(flight):
+    """Yield a flight's chunks as they arrive, from the first one; re-raise its error at the end."""
+    position = 0
+    while True:
+        with flight["changed"]:
+            while position == len(flight["chunks"]) and not flight["done"]:
+                flight["changed"].wait()
+            chunks = flight["chunks"][position:]
+            done = flight["done"]
+        yield from chunks
+        position += len(chunks)
+        if done and position == len(flight["chunks"]):
+            if flight["error"] is not None:
+                raise flight["error"]
+            return
+
+def llm_call_info():
+    """Upstream call counters and the calls in flight, for /health."""
+    with llm_flights_lock:
+        return {"in_flight": len(llm_flights), "max_concurrent": LLM_MAX_CONCURRENT,
+                "max_waiters": LLM_MAX_WAITERS, **llm_call_stats}
+
+def open_llm_stream(key, completion, cache=True):
+    """Chunks of the upstream completion for key, and a function to call once done with them.
+
+    The request takes a waiter slot and follows the upstream call for key, joining one already
+    in flight if there is one; each follower gets every chunk as it arrives. Raises LLMBusy when
+    no waiter slot is free or a new call is needed and no upstream slot is. The call runs on the
+    LLM pool, so it finishes (and is cached) even if the requests following it go away. The
+    returned function gives the waiter slot back.
+    """
+    if not llm_waiter_slots.acquire(blocking=False):
+        with llm_flights_lock:
+            llm_call_stats["rejected"] += 1
+        raise LLMBusy()
+    try:
+        flight = join_llm_flight(key, completion, cache)
+    except LLMBusy:
+        llm_waiter_slots.release()
+        raise
+    return follow_llm_flight(flight), llm_waiter_slots.release
+
+def stream_prompt(template, disease):
+    """Chunks of the completion of a prompt template for a disease, and a function to call once done.
+
+    A cached completion is replayed in the chunks it originally streamed in; otherwise the
+    request follows the upstream call as open_llm_stream describes.
+    """
+    key = llm_cache_key(template, disease)
+    chunks = llm_cache_get(key)
+    if chunks is not None:
+        return iter(chunks), lambda: None
+    return open_llm_stream(key, llm_completion(template, disease))
+
+def complete_prompt(template, disease):
+    """Completion text of a prompt template for a disease (cached and coalesced like stream_prompt)."""
+    chunks, release = stream_prompt(template, disease)
+    try:
+        return "".join(chunks)
+    finally:
+        release()
 
 def clean_text(text):
     """Remove hidden Unicode characters and normalize text."""
     if isinstance(text, str):
         text = text.replace("\u200b", "")
-        text = re.sub(r'[^\x00-\x7F]+', ' ', text)
+        text = NON_ASCII_PATTERN.sub(' ', text)
         text = unicodedata.normalize('NFKD', text)
         # Replace LaTeX-like symbols
         text = text.replace('$', '').replace('\\', '')
@@ -34,34 +496,24 @@ def clean_text(text):
 
 def format_text_for_pdf(text):
     """Format text by inserting new lines if there are more than 10 consecutive spaces."""
-    return re.sub(r' {10,}', '\n', text)
+    return LONG_SPACE_PATTERN.sub('\n', text)
 
 def is_valid_url(text):
     """Check if a given text is a valid URL."""
-    return re.match(r'^https?:\/\/\S+', text) is not None
+    return URL_PATTERN.match(text) is not None
 
 def extract_urls(text):
     """Extract all URLs from the text and return them as a list."""
-    urls = re.findall(r'https?:\/\/\S+', text)
-    return urls
+    return URL_PATTERN.findall(text)
 
 def format_urls_to_click_links(text):
     """Replace URLs in the text with 'Click Link' or 'Click Link1', 'Click Link2', etc., for multiple URLs."""
-    urls = extract_urls(text)
-    if not urls:
+    count = len(extract_urls(text))
+    if not count:
         return text
-
-    if len(urls) == 1:
-        # Single URL: Replace with "Click Link"
-        link_html = f'<a href="{urls[0]}" target="_blank">Click Link</a>'
-        return re.sub(r'https?:\/\/\S+', link_html, text, count=1)
-    else:
-        # Multiple URLs: Replace with "Click Link1", "Click Link2", etc.
-        result = text
-        for i, url in enumerate(urls, 1):
-            link_html = f'<a href="{url}" target="_blank">Click Link{i}</a>'
-            result = re.sub(r'https?:\/\/\S+', link_html, result, count=1)
-        return result
+    # One pass over the text, numbering the links as they are found
+    labels = iter(["Click Link"] if count == 1 else [f"Click Link{i}" for i in range(1, count + 1)])
+    return URL_PATTERN.sub(lambda match: f'<a href="{match.group(0)}" target="_blank">{next(labels)}</a>', text)
 
 def truncate_text(text, max_length=100):
     """Truncate text to a maximum length and add ellipsis if truncated."""
@@ -69,38 +521,970 @@ def truncate_text(text, max_length=100):
         return text[:max_length].rsplit(' ', 1)[0] + "..."
     return text
 
-def fetch_diseases():
-    """Load data from all sheets into a dictionary."""
-    global fetched_data
-    sheets_to_load = [
-        "Prevalence",
-        "Publications",
-        "Classification",
-        "Symptoms",
-        "Inheritance",
-        "Genetic Variation",
-        "Approved Treatments",
-        "Biopharma Pipeline",
-    ]
+def clean_text_column(column):
+    """clean_text over a whole column of cell values (stringified first) with vectorized string operations."""
+    return (column.astype(str)
+            .str.replace("\u200b", "", regex=False)
+            .str.replace(NON_ASCII_PATTERN, " ", regex=True)
+            .str.normalize("NFKD")
+            .str.replace("$", "", regex=False)
+            .str.replace("\\", "", regex=False))
+
+def truncate_column(column, max_length=100):
+    """truncate_text over a column of strings."""
+    long = column.str.len() > max_length
+    shortened = column[long].str.slice(0, max_length).str.rsplit(" ", n=1).str[0] + "..."
+    return column.mask(long, shortened)
+
+def link_column(column):
+    """format_urls_to_click_links over a column, leaving non-string cells and cells without URLs as they are."""
+    if column.dtype != object:
+        return column
+    has_url = column.str.contains(URL_PATTERN, na=False)
+    return column.mask(has_url, column[has_url].map(format_urls_to_click_links))
+
+def workbook_hash(path):
+    """Return the SHA-256 hex digest of the workbook's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def snapshot_path(content_hash):
+    """Path of the snapshot for a workbook hash under the current format, code and pandas version."""
+    name = f"workbook-{content_hash[:32]}-v{SNAPSHOT_FORMAT_VERSION}-code{INGEST_FINGERPRINT}-pandas{pd.__version__}.pkl"
+    return os.path.join(SNAPSHOT_DIR, name)
+
+def load_snapshot(content_hash, sheets):
+    """Load previously parsed sheets and their indexes for this workbook hash as (sheets, indexes),
+    or None if there is no usable snapshot."""
+    path = snapshot_path(content_hash)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+    except Exception as e:
+        print(f"✗ Ignoring unreadable snapshot '{path}': {e}")
+        return None
+    if snapshot.get("content_hash") != content_hash or not all(sheet in snapshot["sheets"] for sheet in sheets):
+        return None
+    return {sheet: snapshot["sheets"][sheet] for sheet in sheets}, snapshot["indexes"]
+
+def save_snapshot(content_hash, sheets, indexes):
+    """Write parsed sheets and their indexes to the snapshot cache; failures only cost the next cold start."""
+    path = snapshot_path(content_hash)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"content_hash": content_hash, "sheets": sheets, "indexes": indexes}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        # Atomic rename so concurrent workers never read a half-written file
+        os.replace(tmp_path, path)
+        print(f"✓ Wrote snapshot {path}")
+    except OSError as e:
+        print(f"✗ Could not write snapshot '{path}': {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    prune_snapshots(path)
+
+def prune_snapshots(keep):
+    """Delete snapshots of other workbook versions or formats, so SNAPSHOT_DIR (in memory on
+    Cloud Run) holds one snapshot however often the workbook changes."""
+    for name in os.listdir(SNAPSHOT_DIR):
+        path = os.path.join(SNAPSHOT_DIR, name)
+        if name.startswith("workbook-") and name.endswith(".pkl") and path != keep:
+            try:
+                os.remove(path)
+                print(f"✓ Removed stale snapshot {path}")
+            except OSError as e:
+                print(f"✗ Could not remove stale snapshot '{path}': {e}")
+
+def available_cpus():
+    """Number of cores this process may run on (respects container CPU affinity)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def convert_cell(value):
+    """Convert a streamed openpyxl cell value the same way pd.read_excel does."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def parse_sheet_rows(rows):
+    """Build a DataFrame from streamed worksheet rows with pd.read_excel's header, padding and dtype rules."""
+    data = []
+    last_row_with_data = -1
+    for row in rows:
+        converted_row = [convert_cell(value) for value in row]
+        while converted_row and converted_row[-1] == "":
+            converted_row.pop()
+        if converted_row:
+            last_row_with_data = len(data)
+        data.append(converted_row)
+    data = data[:last_row_with_data + 1]
+    if data:
+        max_width = max(len(row) for row in data)
+        data = [row + [""] * (max_width - len(row)) for row in data]
+    return TextParser(data, header=0, skip_blank_lines=False).read()
+
+def read_workbook_sheet(workbook, sheet):
+    """Parse one sheet of an open read-only workbook into a (sheet, data, error, elapsed_ms) tuple."""
+    start = time.perf_counter()
+    try:
+        worksheet = workbook[sheet]
+        # Read-only sheets trust the stored dimensions, which are often wrong
+        worksheet.reset_dimensions()
+        data = parse_sheet_rows(worksheet.iter_rows(values_only=True))
+        data.fillna("No details available", inplace=True)
+        return sheet, data, None, (time.perf_counter() - start) * 1000
+    except Exception as e:
+        return sheet, None, str(e), (time.perf_counter() - start) * 1000
 
+def stream_workbook_sheets(path, sheets):
+    """Open the workbook once in read-only mode and yield (sheet, data, error, elapsed_ms) per sheet, in order."""
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        for sheet in sheets:
+            yield read_workbook_sheet(workbook, sheet)
+    finally:
+        workbook.close()
+
+def init_sheet_worker(path):
+    """Process pool initializer: open the workbook once for every sheet this process parses."""
+    global sheet_worker_workbook
+    sheet_worker_workbook = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+
+def parse_workbook_sheet(sheet):
+    """Process pool task: parse one sheet of the workbook opened by init_sheet_worker.
+
+    Runs in worker processes, so it must stay a module-level function.
+    """
+    return read_workbook_sheet(sheet_worker_workbook, sheet)
+
+def iter_workbook_sheets(path, sheets):
+    """Yield (sheet, data, error, elapsed_ms) as sheets finish parsing, fanning out across cores.
+
+    With a single core the workbook is opened once and streamed sheet by sheet in-process.
+    Otherwise each worker process opens it once and every sheet is a task of its own, submitted
+    in the given (priority) order, so the first sheets are yielded as soon as they are parsed
+    rather than with the rest of a batch.
+    """
+    workers = min(len(sheets), LOAD_WORKERS or available_cpus())
+    if workers <= 1:
+        yield from stream_workbook_sheets(path, sheets)
+        return
+    # Spawn rather than fork: the loader may run while other threads hold locks
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_sheet_worker,
+                             initargs=(path,)) as pool:
+        futures = [pool.submit(parse_workbook_sheet, sheet) for sheet in sheets]
+        for future in as_completed(futures):
+            yield future.result()
+
+def normalize_disease_name(name):
+    """Canonical form used to match disease names: lowercase with all whitespace collapsed to single spaces."""
+    return " ".join(str(name).lower().split())
+
+def name_column(sheet_name, data):
+    """Column holding the disease name in a sheet, or None if the sheet has none."""
+    if "Disease" in data.columns:
+        return "Disease"
+    if sheet_name == "Classification":
+        return data.columns[0]
+    return None
+
+def build_name_index(sheets):
+    """Index every sheet's rows by integer disease ID.
+
+    Returns (disease_ids, disease_names, name_index): disease_ids maps a canonical name to
+    its ID, disease_names maps an ID back to the first spelling seen, and
+    name_index[sheet][disease_id] lists that disease's row positions in sheet order.
+    """
+    disease_ids = {}
+    disease_names = []
+    name_index = {}
+    for sheet_name, data in sheets.items():
+        column = name_column(sheet_name, data)
+        if column is None:
+            continue
+        rows_by_id = {}
+        for position, name in enumerate(data[column]):
+            if pd.isna(name) or name == "No details available":
+                continue
+            key = normalize_disease_name(name)
+            if not key:
+                continue
+            disease_id = disease_ids.get(key)
+            if disease_id is None:
+                disease_id = disease_ids[key] = len(disease_names)
+                disease_names.append(str(name))
+            rows_by_id.setdefault(disease_id, []).append(position)
+        name_index[sheet_name] = rows_by_id
+    return disease_ids, disease_names, name_index
+
+def build_suggestion_index(sheets):
+    """Disease names from every sheet's Disease column, sorted by lowercase name for prefix search.
+
+    Returns parallel lists (lowercase keys, display names) so a prefix maps to one contiguous run.
+    """
+    names = set()
+    for data in sheets.values():
+        if "Disease" in data.columns:
+            names.update(str(name) for name in data["Disease"].dropna().unique())
+    names.discard("No details available")
+    entries = sorted((name.lower(), name) for name in names)
+    return [key for key, _ in entries], [name for _, name in entries]
+
+def suggest_diseases(current, prefix, limit):
+    """Up to limit disease names starting with the lowercase prefix, via bisect on the sorted keys."""
+    keys = current["suggestion_keys"]
+    names = current["suggestion_names"]
+    suggestions = []
+    for position in range(bisect_left(keys, prefix), len(keys)):
+        if len(suggestions) >= limit or not keys[position].startswith(prefix):
+            break
+        suggestions.append(names[position])
+    return suggestions
+
+def name_trigrams(key):
+    """Character trigrams of a canonical name, padded so that the start and end of the name count."""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def build_trigram_index(keys):
+    """Inverted index from trigram to the IDs (positions in keys) of the names containing it."""
+    trigram_index = {}
+    for name_id, key in enumerate(keys):
+        for gram in name_trigrams(key):
+            trigram_index.setdefault(gram, []).append(name_id)
+    return trigram_index
+
+def fuzzy_match(keys, trigram_index, query, limit):
+    """Rank names by trigram similarity to query; returns [(name_id, score)], best first.
+
+    Candidates are gathered from the query's selective trigrams only, and at most
+    FUZZY_MAX_CANDIDATES of them are rescored, which bounds the work per query. The score
+    averages how much of the query the name covers with the overall (Jaccard) overlap, so
+    long names that contain a misspelled query still rank high.
+    """
+    query_grams = name_trigrams(normalize_disease_name(query))
+    postings = sorted((trigram_index[gram] for gram in query_grams if gram in trigram_index), key=len)
+    if not postings:
+        return []
+    common = max(1, int(len(keys) * FUZZY_COMMON_TRIGRAM_FRACTION))
+    # Fall back to the rarest few when every query trigram is common
+    selective = [ids for ids in postings if len(ids) <= common] or postings[:3]
+    counts = Counter()
+    for ids in selective:
+        counts.update(ids)
+    scored = []
+    for name_id, _ in counts.most_common(FUZZY_MAX_CANDIDATES):
+        grams = name_trigrams(keys[name_id])
+        shared = len(query_grams & grams)
+        score = (shared / len(query_grams) + shared / len(query_grams | grams)) / 2
+        if score >= FUZZY_MIN_SCORE:
+            scored.append((score, name_id))
+    scored.sort(key=lambda match: (-match[0], keys[match[1]]))
+    return [(name_id, round(score, 3)) for score, name_id in scored[:limit]]
+
+def tokenize(text):
+    """Lowercase word tokens of text for full-text search, without URLs or stopwords."""
+    return [token for token in TOKEN_PATTERN.findall(URL_PATTERN.sub(" ", text.lower())) if token not in FULLTEXT_STOPWORDS]
+
+def build_fulltext_index(sheets):
+    """BM25 inverted index over the text of every non-empty cell, excluding the disease name columns.
+
+    Each cell is one document. Postings are numpy arrays of document IDs and term frequencies,
+    so a query scores every matching cell with a few vectorized operations per term.
+    """
+    start = time.perf_counter()
+    cells = []  # (sheet, row position, column) per document ID
+    doc_lengths = []
+    postings = {}
+    for sheet_name, data in sheets.items():
+        skip_column = name_column(sheet_name, data)
+        for column in data.columns:
+            if column == skip_column:
+                continue
+            for row, value in enumerate(data[column]):
+                if not isinstance(value, str) or value == "No details available":
+                    continue
+                tokens = tokenize(value)
+                if not tokens:
+                    continue
+                doc_id = len(cells)
+                cells.append((sheet_name, row, column))
+                doc_lengths.append(len(tokens))
+                for token, frequency in Counter(tokens).items():
+                    entry = postings.get(token)
+                    if entry is None:
+                        entry = postings[token] = ([], [])
+                    entry[0].append(doc_id)
+                    entry[1].append(frequency)
+    postings = {token: (np.array(ids, dtype=np.int32), np.array(frequencies, dtype=np.float32))
+                for token, (ids, frequencies) in postings.items()}
+    doc_lengths = np.array(doc_lengths, dtype=np.float32)
+    size_bytes = (sys.getsizeof(postings) + sys.getsizeof(cells) + doc_lengths.nbytes
+                  + sum(sys.getsizeof(token) + ids.nbytes + frequencies.nbytes for token, (ids, frequencies) in postings.items())
+                  + sum(sys.getsizeof(cell) for cell in cells))
+    return {
+        "cells": cells,
+        "doc_lengths": doc_lengths,
+        "avg_length": float(doc_lengths.mean()) if len(cells) else 0.0,
+        "postings": postings,
+        "stats": {
+            "documents": len(cells),
+            "terms": len(postings),
+            "size_bytes": size_bytes,
+            "build_ms": round((time.perf_counter() - start) * 1000, 1),
+        },
+    }
+
+def fulltext_search(index, query, limit):
+    """Top cells for query by BM25 score; returns [(doc_id, score)], best first."""
+    scores = np.zeros(len(index["cells"]), dtype=np.float32)
+    matched = False
+    for term in set(tokenize(query)):
+        entry = index["postings"].get(term)
+        if entry is None:
+            continue
+        matched = True
+        ids, frequencies = entry
+        idf = math.log(1 + (len(scores) - len(ids) + 0.5) / (len(ids) + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * index["doc_lengths"][ids] / index["avg_length"])
+        scores[ids] += idf * frequencies * (BM25_K1 + 1) / (frequencies + norm)
+    if not matched:
+        return []
+    limit = min(limit, int(np.count_nonzero(scores)))
+    top = np.argpartition(-scores, limit - 1)[:limit]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [(int(doc_id), round(float(scores[doc_id]), 3)) for doc_id in top]
+
+def make_snippet(text, terms, width=160):
+    """Whitespace-collapsed excerpt of text around the first occurrence of any term."""
+    lower = text.lower()
+    positions = [position for position in (lower.find(term) for term in terms) if position >= 0]
+    start = max(0, min(positions) - width // 4) if positions else 0
+    snippet = " ".join(text[start:start + width].split())
+    return ("..." if start > 0 else "") + snippet + ("..." if start + width < len(text) else "")
+
+def json_body(obj):
+    """Compact JSON body, byte-for-byte what jsonify sends outside debug mode."""
+    return f"{app.json.dumps(obj, separators=(',', ':'))}\n".encode("utf-8")
+
+def build_catalogue(sheets):
+    """Pre-serialized JSON bodies for the catalogue endpoints, so their handlers just return a buffer.
+
+    Body keys: "all" (/api/diseases), "alphabetical", "prevalence[_reverse]", "sheet_order[_reverse]"
+    (/get_diseases) and "count" (/get_disease_count). Prevalence-derived bodies are missing when
+    the sheet or its columns are. The listings behind each body (all but "count") are kept under
+    "lists" for paged and projected requests.
+    """
+    all_diseases = set()
+    for data in sheets.values():
+        if "Disease" in data.columns:
+            all_diseases.update(data["Disease"].dropna().unique())
+    lists = {"all": sorted(all_diseases)}
+    disease_count = 0
+    prevalence = sheets.get("Prevalence")
+    if prevalence is not None and "Disease" in prevalence.columns:
+        names = prevalence["Disease"].dropna()
+        disease_count = names.nunique()
+        lists["alphabetical"] = sorted(names.unique())
+        sheet_order = names.tolist()
+        lists["sheet_order"] = sheet_order
+        lists["sheet_order_reverse"] = sheet_order[::-1]
+        if PREVALENCE_COLUMN in prevalence.columns:
+            records = prevalence[["Disease", PREVALENCE_COLUMN]].dropna(subset=["Disease"]).to_dict("records")
+            lists["prevalence"] = records
+            lists["prevalence_reverse"] = records[::-1]
+    bodies = {key: json_body({"diseases": items}) for key, items in lists.items()}
+    if prevalence is not None and "Disease" in prevalence.columns:
+        bodies["count"] = json_body({"count": disease_count})
+    return {"bodies": bodies, "lists": lists, "disease_count": disease_count}
+
+def build_prevalence_index(sheets):
+    """Parsed prevalence figures of the Prevalence sheet, plus value-sorted row orders for range and top-k queries.
+
+    values holds one figure per row (NaN where the cell is not a figure per 100,000), european and
+    birth flag the * and BP markers. "ascending" and "descending" pair the parsed rows, in value
+    order with ties in sheet order, with ascending sort keys, so any range is two binary searches.
+    """
+    prevalence = sheets.get("Prevalence")
+    if prevalence is None or "Disease" not in prevalence.columns or PREVALENCE_COLUMN not in prevalence.columns:
+        return None
+    column = prevalence[PREVALENCE_COLUMN]
+    parts = column.astype(str).str.extract(PREVALENCE_PATTERN)
+    marked = pd.to_numeric(parts["value"].str.replace(",", "", regex=False), errors="coerce")
+    # Numeric cells come through as is; str() would turn small floats into unparseable "1e-05"
+    values = pd.to_numeric(column, errors="coerce").fillna(marked).to_numpy(dtype=float)
+    parsed = np.flatnonzero(~np.isnan(values) & prevalence["Disease"].notna().to_numpy())
+    ascending = parsed[np.argsort(values[parsed], kind="stable")]
+    descending = parsed[np.argsort(-values[parsed], kind="stable")]
+    return {
+        "values": values,
+        "european": parts["european"].notna().to_numpy(),
+        "birth": parts["birth"].notna().to_numpy(),
+        "ascending": (ascending, values[ascending]),
+        "descending": (descending, -values[descending]),
+    }
+
+def prevalence_range(index, minimum, maximum, descending, limit):
+    """Up to limit Prevalence rows valued within [minimum, maximum] (None = unbounded), in order, and the range size."""
+    rows, keys = index["descending" if descending else "ascending"]
+    low, high = (-maximum if maximum is not None else None, -minimum if minimum is not None else None) \
+        if descending else (minimum, maximum)
+    start = 0 if low is None else int(np.searchsorted(keys, low, side="left"))
+    end = len(keys) if high is None else int(np.searchsorted(keys, high, side="right"))
+    return rows[start:min(start + limit, end)], max(end - start, 0)
+
+def encode_cursor(version, offset):
+    """Opaque cursor for the page starting at offset of a listing from the given dataset version."""
+    return base64.urlsafe_b64encode(f"{version}:{offset}".encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor, version):
+    """Offset encoded in cursor; raises ValueError if it is malformed or from another dataset version."""
+    try:
+        cursor_version, offset = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8").split(":")
+        offset = int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if cursor_version != version or offset < 0:
+        raise ValueError("Cursor is from another dataset version; start again without a cursor")
+    return offset
+
+def page_request(args, version):
+    """Read limit, cursor and fields from query args or a JSON body.
+
+    Returns (offset, limit, fields): limit is None unless the client asked for a page and fields
+    None unless it asked for a projection (a list, or a comma-separated string). Raises ValueError
+    for a bad limit, cursor or fields.
+    """
+    limit = args.get("limit")
+    cursor = args.get("cursor")
+    fields = args.get("fields")
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    elif fields is not None and not isinstance(fields, list):
+        raise ValueError("Invalid fields")
+    fields = {str(field).strip() for field in fields or []} - {""} or None
+    if limit is None and not cursor:
+        return 0, None, fields
+    try:
+        limit = DEFAULT_PAGE_SIZE if limit is None else int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid limit")
+    offset = decode_cursor(cursor, version) if cursor else 0
+    return offset, min(max(limit, 1), MAX_PAGE_SIZE), fields
+
+def page_items(items, version, offset, limit):
+    """The requested page of items and the cursor of the next one (None on the last page)."""
+    if limit is None:
+        return items, None
+    end = offset + limit
+    return items[offset:end], encode_cursor(version, end) if end < len(items) else None
+
+def project(records, fields):
+    """Only the requested keys of each record; records left empty (such as notes) are dropped."""
+    if fields is None:
+        return records
+    projected = [{key: value for key, value in record.items() if key in fields} for record in records]
+    return [record for record in projected if record]
+
+def catalogue_response(current, key, args=None):
+    """Send a catalogue listing: its pre-serialized body, or a page/projection of it when args ask for one."""
+    if args is not None:
+        try:
+            offset, limit, fields = page_request(args, current["version"])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        if limit is not None or fields is not None:
+            page, next_cursor = page_items(current["catalogue"]["lists"][key], current["version"], offset, limit)
+            # Projection applies to record listings; plain name lists are returned as they are
+            if page and isinstance(page[0], dict):
+                page = project(page, fields)
+            payload = {"diseases": page}
+            if limit is not None:
+                payload["next_cursor"] = next_cursor
+            return jsonify(payload)
+    return Response(current["catalogue"]["bodies"][key], mimetype="application/json")
+
+# Dataset keys filled by build_indexes, which the snapshot stores alongside the sheets
+INDEX_KEYS = ("disease_ids", "disease_names", "name_index", "suggestion_keys", "suggestion_names", "disease_keys",
+              "trigram_index", "fulltext_index", "catalogue", "prevalence_index", "documents", "pdf_items")
+
+def build_indexes(sheets, complete):
+    """Lookup indexes of a dataset, built from its sheets in the configured order.
+
+    Partial datasets published while loading only get the name index and the catalogue; the
+    other indexes are empty or None, as in the initial dataset, until the load completes. The
+    indexes of a complete load are pickled into the snapshot along with the sheets.
+    """
+    disease_ids, disease_names, name_index = build_name_index(sheets)
+    # Canonical names by disease ID (dicts keep insertion order, which is ID order)
+    disease_keys = list(disease_ids)
+    indexes = {
+        "disease_ids": disease_ids,
+        "disease_names": disease_names,
+        "name_index": name_index,
+        "suggestion_keys": [],
+        "suggestion_names": [],
+        "disease_keys": disease_keys,
+        "trigram_index": {},
+        "fulltext_index": None,
+        "catalogue": build_catalogue(sheets),
+        "prevalence_index": None,
+        "documents": None,
+        "pdf_items": None,
+    }
+    if complete:
+        suggestion_keys, suggestion_names = build_suggestion_index(sheets)
+        prevalence_index = build_prevalence_index(sheets)
+        indexes.update({
+            "suggestion_keys": suggestion_keys,
+            "suggestion_names": suggestion_names,
+            "trigram_index": build_trigram_index(disease_keys),
+            "fulltext_index": build_fulltext_index(sheets),
+            "prevalence_index": prevalence_index,
+            "documents": build_documents(sheets, name_index, disease_keys),
+            "pdf_items": build_pdf_items(sheets, prevalence_index),
+        })
+    return indexes
+
+def make_dataset(content_hash, sheets, failed_sheets, load_timings, complete, indexes=None):
+    """Wrap parsed sheets and their lookup indexes (built unless given) into an immutable dataset,
+    keeping the configured sheet order."""
+    sheets = {sheet: sheets[sheet] for sheet in SHEETS_TO_LOAD if sheet in sheets}
+    return {
+        "version": content_hash[:12],
+        "content_hash": content_hash,
+        "sheets": MappingProxyType(sheets),
+        "failed_sheets": dict(failed_sheets),
+        "load_timings_ms": dict(load_timings),
+        "loaded_at": time.time(),
+        "complete": complete,
+        **(indexes if indexes is not None else build_indexes(sheets, complete)),
+    }
+
+def find_disease_rows(current, sheet_name, query, disease_id=None):
+    """Rows of sheet_name for the disease named by query (or given by disease_id), via the name index."""
+    data = current["sheets"][sheet_name]
+    if disease_id is None:
+        disease_id = current["disease_ids"].get(normalize_disease_name(query))
+    positions = current["name_index"].get(sheet_name, {}).get(disease_id, [])
+    return data.iloc[positions]
+
+def sheet_documents(sheet_name, data, positions_by_id, disease_keys):
+    """Finished /fetch_data records of one sheet for each disease ID in positions_by_id.
+
+    Applies the sheet's column drops, notes and link formatting, and collapses the Biopharma
+    Pipeline "Unnamed" columns into one "Pipeline" list. Diseases without rows get no entry.
+    """
+    wanted = sorted(position for positions in positions_by_id.values() for position in positions)
+    subset = data.iloc[wanted]
+    documents = {}
+    if sheet_name == "Classification":
+        categories = subset.columns[1:]
+        values = subset[categories]
+        rows, cols = np.nonzero((values.notna() & values.ne("No details available")).to_numpy())
+        # Clean only the cells that are shown, in one vectorized pass
+        cleaned = clean_text_column(pd.Series(values.to_numpy()[rows, cols], dtype=object)).to_numpy()
+        entries = {position: {} for position in wanted}
+        for row, col, value in zip(rows, cols, cleaned):
+            entries[wanted[row]][categories[col]] = value
+        for disease_id, positions in positions_by_id.items():
+            if positions:
+                name = disease_keys[disease_id].capitalize()
+                documents[disease_id] = [{"Disease": name, **entries[position]} for position in positions]
+        return documents
+
+    # Exclude specific column for Publications sheet
+    if sheet_name == "Publications":
+        subset = subset.drop(columns=[PUBLICATIONS_COUNT_COLUMN], errors="ignore")
+    # Format URLs as "Click Link" for specific sheets
+    if sheet_name in LINK_SHEETS:
+        subset = subset.apply(link_column)
+    pipeline = [col for col in subset.columns if str(col).startswith("Unnamed")] if sheet_name == "Biopharma Pipeline" else []
+    records = subset.drop(columns=pipeline).to_dict(orient="records")
+    if pipeline:
+        for record, values in zip(records, subset[pipeline].to_numpy()):
+            record[PIPELINE_COLUMN] = [value for value in values if pd.notna(value) and value != "No details available"]
+    rows = dict(zip(wanted, records))
+    note = SHEET_NOTES.get(sheet_name)
+    for disease_id, positions in positions_by_id.items():
+        if positions:
+            documents[disease_id] = [rows[position] for position in positions] + ([{"NOTE": note}] if note else [])
+    return documents
+
+def sheet_pdf_items(sheet_name, data, prevalence_index):
+    """PDF report content of every row of a sheet, so the report renderer only has to draw it.
+
+    Classification rows become their category names. Other rows become (label, text, links)
+    items: label is None for Biopharma Pipeline entries, text is cleaned and ready to print
+    (with the URLs taken out when there are links) and links are shown as "Click Link" labels.
+    """
+    if sheet_name == "Classification":
+        categories = data.columns[1:]
+        keep = (data[categories].notna() & data[categories].ne("No details available")).to_numpy()
+        return [[col for col, kept in zip(categories, flags) if kept] for flags in keep]
+
+    items = [[] for _ in range(len(data))]
+    columns = [col for col in data.columns if col != "Disease"]
+    if sheet_name == "Biopharma Pipeline":
+        # Named columns first, then the "Unnamed" columns as one continuous list without labels
+        columns.sort(key=lambda col: str(col).startswith("Unnamed"))
+    for col in columns:
+        raw = data[col]
+        # Placeholder cells are never printed, so only the rest is normalized
+        raw = raw[raw.notna() & raw.ne("No details available")]
+        text = clean_text_column(raw).str.replace(LONG_SPACE_PATTERN, "\n", regex=True)
+        links = None
+        if sheet_name == "Biopharma Pipeline" and str(col).startswith("Unnamed"):
+            label = None
+            show = text.ne("") & text.ne("No details available")
+            links = text.str.findall(URL_PATTERN)
+            has_links = links.str.len() > 0
+            text = truncate_column(text.mask(has_links, text.str.replace(URL_PATTERN, "", regex=True).str.strip()))
+        else:
+            label = col
+            show = pd.Series(True, index=raw.index)
+            if sheet_name in ["Publications", "Approved Treatments"]:
+                # Skip cells with only URLs and no other meaningful data
+                raw_text = raw.astype(str)
+                show &= ~(raw_text.str.contains(URL_PATTERN) & raw_text.str.replace(URL_PATTERN, "", regex=True).str.strip().eq(""))
+                links = text.str.findall(URL_PATTERN)
+                has_links = links.str.len() > 0
+                text = text.str.replace(URL_PATTERN, "", regex=True).str.strip().where(has_links, truncate_column(text))
+            elif col == PREVALENCE_COLUMN and prevalence_index is not None:
+                # Plain figures are printed with thousands separators, marked ones as written
+                values = prevalence_index["values"][raw.index]
+                plain = ~np.isnan(values) & ~prevalence_index["european"][raw.index] & ~prevalence_index["birth"][raw.index]
+                text = text.mask(plain, pd.Series(values, index=raw.index).map("{:,.2f}".format))
+        for row, value, urls in zip(raw.index[show.to_numpy()], text[show], links[show] if links is not None else repeat([])):
+            items[row].append((label, value, urls))
+    return items
+
+def build_pdf_items(sheets, prevalence_index):
+    """PDF report content per sheet, indexed by row position."""
+    return {
+        sheet_name: sheet_pdf_items(sheet_name, data, prevalence_index)
+        for sheet_name, data in sheets.items()
+        if "Disease" in data.columns or sheet_name == "Classification"
+    }
+
+def build_documents(sheets, name_index, disease_keys):
+    """Finished /fetch_data records per sheet, keyed by disease ID, so serving a sheet is a dict lookup."""
+    return {
+        sheet_name: sheet_documents(sheet_name, data, name_index.get(sheet_name, {}), disease_keys)
+        for sheet_name, data in sheets.items()
+        if "Disease" in data.columns or sheet_name == "Classification"
+    }
+
+def sheet_records(current, sheet_name, query, disease_id=None):
+    """Response records of one loaded sheet for a disease, with the sheet's notes and link formatting.
+
+    Returns (records, None), or (None, error message) when the disease has no records there.
+    The records are shared between requests and must not be modified.
+    """
+    data = current["sheets"][sheet_name]
+    if "Disease" not in data.columns and sheet_name != "Classification":
+        return None, "No 'Disease' column found in sheet"
+    if disease_id is None:
+        disease_id = current["disease_ids"].get(normalize_disease_name(query))
+    if current["documents"] is not None:
+        records = current["documents"][sheet_name].get(disease_id)
+    else:
+        # Partial datasets published while loading build just the requested document
+        positions = current["name_index"].get(sheet_name, {}).get(disease_id, [])
+        records = sheet_documents(sheet_name, data, {disease_id: positions}, current["disease_keys"]).get(disease_id)
+    if not records:
+        if sheet_name == "Classification":
+            return None, "No matching records found in Classification."
+        return None, "No matching records found for this disease."
+    return records, None
+
+def build_dataset(path, content_hash=None, publish=None):
+    """Load every sheet into a new immutable dataset, using the on-disk snapshot when the workbook is unchanged.
+
+    When given, publish is called with a partial dataset each time another sheet finishes parsing.
+    """
     print("=" * 50)
     print("Loading disease data from Excel file...")
     print("=" * 50)
-    
-    for sheet in sheets_to_load:
-        try:
-            print(f"Loading sheet: {sheet}")
-            data = pd.read_excel(file_path, sheet_name=sheet)
-            data.fillna("No details available", inplace=True)
+
+    start = time.perf_counter()
+    content_hash = content_hash or workbook_hash(path)
+    sheets = {}
+    failed_sheets = {}
+    load_timings = {}
+    indexes = None
+    snapshot = load_snapshot(content_hash, SHEETS_TO_LOAD)
+    if snapshot is not None:
+        sheets, indexes = snapshot
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"✓ Loaded {len(sheets)} sheets and their indexes from snapshot in {elapsed_ms:.0f} ms.")
+    else:
+        for sheet, data, error, elapsed_ms in iter_workbook_sheets(path, SHEETS_TO_LOAD):
+            load_timings[sheet] = round(elapsed_ms, 1)
+            if error is not None:
+                print(f"✗ Error loading sheet '{sheet}': {error}")
+                failed_sheets[sheet] = error
+                continue
             print(f"Columns in {sheet}: {list(data.columns)}")
-            fetched_data[sheet] = data
-            print(f"✓ Loaded {len(data)} rows from {sheet}.")
-        except Exception as e:
-            print(f"✗ Error loading sheet '{sheet}': {e}")
-    
+            print(f"✓ Loaded {len(data)} rows from {sheet} in {elapsed_ms:.0f} ms.")
+            sheets[sheet] = data
+            if publish and len(sheets) < len(SHEETS_TO_LOAD):
+                publish(make_dataset(content_hash, sheets, failed_sheets, load_timings, complete=False))
+        print(f"Parsed workbook in {(time.perf_counter() - start) * 1000:.0f} ms.")
+
+    new_dataset = make_dataset(content_hash, sheets, failed_sheets, load_timings, complete=True, indexes=indexes)
+    # Only snapshot a complete load, otherwise a failed sheet would stay missing
+    if snapshot is None and len(sheets) == len(SHEETS_TO_LOAD):
+        save_snapshot(content_hash, sheets, {key: new_dataset[key] for key in INDEX_KEYS})
     print("=" * 50)
-    print(f"Data loading complete! {len(fetched_data)} sheets loaded.")
+    print(f"Data loading complete! {len(sheets)} sheets loaded.")
     print("=" * 50)
+    return new_dataset
+
+def publish_dataset(new_dataset):
+    """Make new_dataset the current one and wake requests waiting for sheets."""
+    global dataset
+    with dataset_published:
+        previous_version = dataset["version"]
+        # Single reference assignment: readers see either the old or the new dataset, never a mix
+        dataset = new_dataset
+        dataset_published.notify_all()
+    if new_dataset["version"] != previous_version:
+        clear_pdf_cache(new_dataset["version"])
+
+def fetch_diseases():
+    """Load data from all sheets and publish it as the current dataset."""
+    publish_dataset(build_dataset(file_path))
+
+def load_dataset_in_background():
+    """Load the dataset sheet by sheet in priority order, publishing each sheet as soon as it is parsed."""
+    with dataset_lock:
+        if dataset["complete"]:
+            return
+        try:
+            publish_dataset(build_dataset(file_path, publish=publish_dataset))
+        except Exception as e:
+            # Leave the dataset incomplete; the next request starts another attempt
+            print(f"✗ Background data load failed: {e}")
+            return
+    start_reload_watcher()
+
+def start_background_load():
+    """Start loading the dataset on a background thread, unless it is loaded or already loading."""
+    global loader_thread
+    with dataset_published:
+        if dataset["complete"] or (loader_thread and loader_thread.is_alive()):
+            return
+        loader_thread = threading.Thread(target=load_dataset_in_background, name="dataset-loader", daemon=True)
+        loader_thread.start()
+
+def wait_for_dataset(sheets=None, timeout=None):
+    """Return the current dataset once the given sheets (default: all) are loaded, or None on timeout.
+
+    Starts the background load if needed. A finished load is returned even if some sheets
+    failed, so handlers report missing sheets as before instead of waiting forever.
+    """
+    start_background_load()
+    sheets = sheets or SHEETS_TO_LOAD
+    deadline = time.monotonic() + (SHEET_WAIT_SECONDS if timeout is None else timeout)
+    with dataset_published:
+        while not dataset["complete"] and not all(sheet in dataset["sheets"] for sheet in sheets):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            dataset_published.wait(remaining)
+        return dataset
+
+def data_not_ready(sheets=None):
+    """503 response for requests whose sheets are still loading."""
+    sheets = sheets or SHEETS_TO_LOAD
+    pending = [sheet for sheet in sheets if sheet not in dataset["sheets"]]
+    response = jsonify({"error": "Disease data is still loading. Please retry shortly.", "pending_sheets": pending})
+    return response, 503, {"Retry-After": str(RETRY_AFTER_SECONDS)}
+
+def reload_dataset():
+    """Rebuild the dataset from the workbook and swap it in once complete.
+
+    Returns the version being served afterwards, or None if another build is already running.
+    """
+    if not dataset_lock.acquire(blocking=False):
+        return None
+    try:
+        content_hash = workbook_hash(file_path)
+        if content_hash == dataset["content_hash"]:
+            print("Workbook unchanged, keeping the current dataset.")
+            return dataset["version"]
+        new_dataset = build_dataset(file_path, content_hash)
+        if len(new_dataset["sheets"]) < len(SHEETS_TO_LOAD):
+            print("✗ Reload incomplete, keeping the current dataset.")
+            return dataset["version"]
+        publish_dataset(new_dataset)
+        print(f"✓ Swapped in dataset version {dataset['version']}.")
+        return dataset["version"]
+    except Exception as e:
+        print(f"✗ Reload failed, keeping the current dataset: {e}")
+        return dataset["version"]
+    finally:
+        dataset_lock.release()
+
+def workbook_mtime():
+    """Modification time of the workbook, or None if it is missing (e.g. mid-replace)."""
+    try:
+        return os.stat(file_path).st_mtime
+    except OSError:
+        return None
+
+def reload_marker_mtime():
+    """Modification time of the reload marker, or None if no reload was ever requested."""
+    try:
+        return os.stat(RELOAD_MARKER_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+def request_reload():
+    """Touch the reload marker so that every process's watcher reloads the workbook."""
+    os.makedirs(os.path.dirname(RELOAD_MARKER_PATH) or ".", exist_ok=True)
+    with open(RELOAD_MARKER_PATH, "w") as f:
+        f.write(f"{time.time_ns()}\n")
+
+def watch_workbook():
+    """Reload when the reload marker is touched, and when the workbook's mtime changes and the
+    change has settled for one poll interval."""
+    seen = workbook_mtime()
+    marker = reload_marker_mtime()
+    changed = False
+    # A worker forked after a reload starts from the master's older dataset, so catch up first
+    if dataset["complete"]:
+        reload_dataset()
+    next_poll = time.monotonic() + RELOAD_POLL_SECONDS
+    while True:
+        time.sleep(RELOAD_MARKER_POLL_SECONDS)
+        requested = reload_marker_mtime()
+        # A request seen while another build holds the lock is retried on the next check
+        if requested != marker and reload_dataset() is not None:
+            marker = requested
+        if RELOAD_POLL_SECONDS <= 0 or time.monotonic() < next_poll:
+            continue
+        next_poll = time.monotonic() + RELOAD_POLL_SECONDS
+        mtime = workbook_mtime()
+        if mtime is None:
+            continue
+        if mtime != seen:
+            # Let the copy finish before reading the file
+            seen = mtime
+            changed = True
+        elif changed:
+            changed = False
+            reload_dataset()
+
+def start_reload_watcher():
+    """Start the workbook watcher thread once per process."""
+    global watcher_thread
+    if watcher_thread and watcher_thread.is_alive():
+        return
+    watcher_thread = threading.Thread(target=watch_workbook, name="workbook-watcher", daemon=True)
+    watcher_thread.start()
+
+def pdf_cache_key(current, disease_id, title):
+    """Content address of a rendered report: what the PDF is built from, hashed."""
+    return hashlib.sha256(f"{current['content_hash']}\0{disease_id}\0{title}".encode("utf-8")).hexdigest()
+
+def pdf_cache_path(version, key):
+    """Disk tier location of a cached report."""
+    return os.path.join(PDF_CACHE_DIR, version, f"{key}.pdf")
+
+def pdf_cache_get(version, key):
+    """Cached report bytes, from memory or the disk tier, or None on a miss."""
+    with pdf_cache_lock:
+        body = pdf_cache.get(key)
+        if body is not None:
+            pdf_cache.move_to_end(key)
+            pdf_cache_stats["hits"] += 1
+            return body
+    if PDF_CACHE_DIR:
+        try:
+            with open(pdf_cache_path(version, key), "rb") as f:
+                body = f.read()
+        except OSError:
+            pass
+        else:
+            with pdf_cache_lock:
+                pdf_cache_stats["disk_hits"] += 1
+            pdf_cache_put(version, key, body, write_disk=False)
+            return body
+    with pdf_cache_lock:
+        pdf_cache_stats["misses"] += 1
+    return None
+
+def pdf_cache_put(version, key, body, write_disk=True):
+    """Cache a rendered report, evicting least recently used ones beyond the byte budget."""
+    global pdf_cache_size
+    if len(body) <= PDF_CACHE_BYTES:
+        with pdf_cache_lock:
+            if key not in pdf_cache:
+                pdf_cache[key] = body
+                pdf_cache_size += len(body)
+            while pdf_cache_size > PDF_CACHE_BYTES:
+                _, evicted = pdf_cache.popitem(last=False)
+                pdf_cache_size -= len(evicted)
+                pdf_cache_stats["evictions"] += 1
+    if PDF_CACHE_DIR and write_disk:
+        path = pdf_cache_path(version, key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"✗ Could not write cached report '{path}': {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+def clear_pdf_cache(version):
+    """Drop cached reports of every dataset version but the given one."""
+    global pdf_cache_size
+    with pdf_cache_lock:
+        pdf_cache.clear()
+        pdf_cache_size = 0
+    if PDF_CACHE_DIR and os.path.isdir(PDF_CACHE_DIR):
+        for entry in os.listdir(PDF_CACHE_DIR):
+            if entry != version:
+                shutil.rmtree(os.path.join(PDF_CACHE_DIR, entry), ignore_errors=True)
+
+def pdf_cache_info():
+    """Size and hit/miss/eviction counters of the report cache, for /health."""
+    with pdf_cache_lock:
+        return {"entries": len(pdf_cache), "bytes": pdf_cache_size, "budget_bytes": PDF_CACHE_BYTES,
+                "disk_tier": bool(PDF_CACHE_DIR), **pdf_cache_stats}
+
+def pdf_render_info():
+    """Render counters and the largest render time and report size seen."""
+    with pdf_cache_lock:
+        return {"concurrency": PDF_RENDER_CONCURRENCY, **pdf_render_stats}
+
+def pdf_response(body, filename):
+    """Attachment response for a rendered report, with its length and an RFC 6266 file name."""
+    # Plain-ASCII fallback for old clients; filename* carries the exact (UTF-8) name
+    fallback = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+    fallback = re.sub(r'[\x00-\x1f\x7f"\\]', "_", fallback)
+    return Response(body, mimetype="application/pdf", headers={
+        "Content-Length": str(len(body)),
+        "Content-Disposition": f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}",
+    })
 
 @app.route("/", methods=["GET"])
 def index():
@@ -110,6 +1494,8 @@ def index():
         "version": "1.0",
         "endpoints": {
             "health": "/health",
+            "livez": "/livez",
+            "readyz": "/readyz",
             "diseases": "/api/diseases",
             "search": "/api/search/<query>",
             "fetch_data": "/fetch_data",
@@ -118,36 +1504,88 @@ def index():
         }
     })
 
+@app.route("/livez", methods=["GET"])
+def livez():
+    """Liveness probe: the process is up and serving, whether or not data has loaded."""
+    return jsonify({"status": "alive"}), 200
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """Readiness probe with per-sheet status; 503 until every sheet has finished loading."""
+    current = dataset
+    if not current["complete"]:
+        start_background_load()
+    sheets = {}
+    for sheet in SHEETS_TO_LOAD:
+        if sheet in current["sheets"]:
+            sheets[sheet] = "ready"
+        elif sheet in current["failed_sheets"]:
+            sheets[sheet] = "failed"
+        else:
+            sheets[sheet] = "loading"
+    body = jsonify({
+        "ready": current["complete"],
+        "data_version": current["version"],
+        "sheets": sheets,
+    })
+    if not current["complete"]:
+        return body, 503, {"Retry-After": str(RETRY_AFTER_SECONDS)}
+    return body, 200
+
 @app.route("/health", methods=["GET"])
 def health():
     """Health check endpoint."""
     return jsonify({
         "status": "healthy",
-        "data_loaded": len(fetched_data) > 0,
-        "sheets_count": len(fetched_data)
+        "data_loaded": len(dataset["sheets"]) > 0,
+        "sheets_count": len(dataset["sheets"]),
+        "data_version": dataset["version"],
+        "load_timings_ms": dataset["load_timings_ms"],
+        "fulltext_index": dataset["fulltext_index"]["stats"] if dataset["fulltext_index"] else None,
+        "pdf_cache": pdf_cache_info(),
+        "pdf_render": pdf_render_info(),
+        "llm_cache": llm_cache_info(),
+        "llm_calls": llm_call_info(),
+        "geographic_spread": geographic_spread_info(),
+        "chat_context": chat_context_info(),
+        "chat_cache": chat_cache_info(),
     }), 200
 
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    """Rebuild the dataset from the workbook in the background and swap it in when complete.
+
+    This process starts at once; the others follow within a second through the reload marker.
+    """
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled. ADMIN_TOKEN is not configured."}), 403
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN):
+        return jsonify({"error": "Invalid admin token"}), 401
+    try:
+        request_reload()
+    except OSError as e:
+        return jsonify({"error": f"Could not signal the other workers: {e}"}), 500
+    if dataset_lock.locked():
+        return jsonify({"status": "reload already in progress", "version": dataset["version"]}), 202
+    threading.Thread(target=reload_dataset, name="dataset-reload", daemon=True).start()
+    return jsonify({"status": "reloading", "version": dataset["version"]}), 202
+
 @app.route("/api/diseases", methods=["GET"])
 def get_all_diseases_list():
-    """Get list of all diseases."""
-    global fetched_data
-    if not fetched_data:
-        fetch_diseases()
-
-    all_diseases = set()
-    for sheet in fetched_data.values():
-        if 'Disease' in sheet.columns:
-            all_diseases.update(sheet['Disease'].dropna().unique())
-    
-    return jsonify({"diseases": sorted(all_diseases)})
+    """Get list of all diseases (optional limit/cursor pagination)."""
+    current = wait_for_dataset()
+    if current is None:
+        return data_not_ready()
+    return catalogue_response(current, "all", request.args)
 
 @app.route("/api/search/<path:query>", methods=["GET"])
 def search(query):
     """Search endpoint - returns available sheets for a disease."""
-    global fetched_data
-    if not fetched_data:
-        fetch_diseases()
-        
+    current = wait_for_dataset()
+    if current is None:
+        return data_not_ready()
+    fetched_data = current["sheets"]
+
     query = query.replace("%20", " ").replace("%0A", "\n").strip()
     sheets = list(fetched_data.keys())  # e.g., ["Prevalence", "Publications", ...]
     # Insert "Geographic Spread" after "Prevalence"
@@ -167,133 +1605,232 @@ def search(query):
 
 @app.route("/search_suggestions")
 def search_suggestions():
-    """Fetch disease name suggestions as the user types."""
-    global fetched_data
+    """Fetch disease name suggestions as the user types (optional limit, default 10)."""
     query = request.args.get("query", "").strip().lower()
+    limit = min(max(request.args.get("limit", DEFAULT_SUGGESTIONS, type=int), 1), MAX_SUGGESTIONS)
 
     if not query:
         return jsonify([])
 
-    all_diseases = set()
-    for sheet in fetched_data.values():
-        if 'Disease' in sheet.columns:
-            all_diseases.update(sheet['Disease'].dropna().unique())
+    current = wait_for_dataset()
+    if current is None:
+        return data_not_ready()
 
     # Match diseases starting with the query
-    matching_diseases = sorted([d for d in all_diseases if str(d).lower().startswith(query)])
-    return jsonify(matching_diseases[:10])
+    return jsonify(suggest_diseases(current, query, limit))
+
+@app.route("/api/fuzzy_search")
+def fuzzy_search():
+    """Typo-tolerant disease name search ranked by trigram similarity (optional limit, default 10)."""
+    query = request.args.get("query", "").strip()
+    limit = min(max(request.args.get("limit", DEFAULT_SUGGESTIONS, type=int), 1), MAX_SUGGESTIONS)
+
+    if not query:
+        return jsonify({"query": query, "results": []})
+
+    current = wait_for_dataset()
+    if current is None:
+        return data_not_ready()
+
+    start = time.perf_counter()
+    matches = fuzzy_match(current["disease_keys"], current["trigram_index"], query, limit)
+    results = [{"disease": current["disease_names"][name_id], "score": score} for name_id, score in matches]
+    return jsonify({"query": query, "results": results, "took_ms": round((time.perf_counter() - start) * 1000, 3)})
+
+@app.route("/api/fulltext")
+def fulltext():
+    """BM25 full-text search over the cell text of every sheet (optional limit, default 20)."""
+    query = request.args.get("query", "").strip()
+    limit = min(max(request.args.get("limit", DEFAULT_FULLTEXT_RESULTS, type=int), 1), MAX_FULLTEXT_RESULTS)
+
+    if not query:
+        return jsonify({"query": query, "results": []})
+
+    current = wait_for_dataset()
+    if current is None or current["fulltext_index"] is None:
+        return data_not_ready()
+
+    start = time.perf_counter()
+    index = current["fulltext_index"]
+    terms = tokenize(query)
+    results = []
+    for doc_id, score in fulltext_search(index, query, limit):
+        sheet_name, row, column = index["cells"][doc_id]
+        data = current["sheets"][sheet_name]
+        results.append({
+            "disease": str(data[name_column(sheet_name, data)].iloc[row]),
+            "sheet": sheet_name,
+            "column": column,
+            "score": score,
+            "snippet": make_snippet(data[column].iloc[row], terms),
+        })
+    return jsonify({"query": query, "results": results, "took_ms": round((time.perf_counter() - start) * 1000, 3)})
+
+@app.route("/api/prevalence")
+def prevalence():
+    """Diseases ranked by parsed prevalence (order=asc|desc, default desc), optionally within min/max, top limit."""
+    order = request.args.get("order", "desc").lower()
+    if order not in ("asc", "desc"):
+        return jsonify({"error": "Invalid order"}), 400
+    # Malformed bounds are rejected rather than ignored, which would return the unfiltered ranking
+    bounds = {"min": None, "max": None}
+    for key in bounds:
+        if key not in request.args:
+            continue
+        try:
+            bounds[key] = float(request.args[key])
+        except ValueError:
+            return jsonify({"error": f"Invalid {key}"}), 400
+        if not math.isfinite(bounds[key]):
+            return jsonify({"error": f"Invalid {key}"}), 400
+    minimum, maximum = bounds["min"], bounds["max"]
+    limit = min(max(request.args.get("limit", DEFAULT_PREVALENCE_RESULTS, type=int), 1), MAX_PREVALENCE_RESULTS)
+
+    current = wait_for_dataset(["Prevalence"])
+    if current is None:
+        return data_not_ready(["Prevalence"])
+    index = current["prevalence_index"]
+    if index is None and not current["complete"]:
+        # Partial datasets published while loading build it on demand
+        index = build_prevalence_index(current["sheets"])
+    if index is None:
+        return jsonify({"error": "Required columns not found in Prevalence sheet"}), 400
+
+    start = time.perf_counter()
+    rows, total = prevalence_range(index, minimum, maximum, order == "desc", limit)
+    data = current["sheets"]["Prevalence"]
+    diseases = [{
+        "Disease": disease,
+        PREVALENCE_COLUMN: raw,
+        "prevalence": float(index["values"][row]),
+        "european": bool(index["european"][row]),
+        "birth_prevalence": bool(index["birth"][row]),
+    } for row, disease, raw in zip(rows, data["Disease"].to_numpy()[rows], data[PREVALENCE_COLUMN].to_numpy()[rows])]
+    return jsonify({"order": order, "total": total, "diseases": diseases,
+                    "took_ms": round((time.perf_counter() - start) * 1000, 3)})
 
 @app.route("/get_diseases")
 def get_diseases():
-    """Fetch disease names based on the requested type (alphabetical, prevalence order, or sheet order)."""
-    global fetched_data
+    """Fetch disease names based on the requested type (alphabetical, prevalence order, or sheet order).
+
+    Optional limit/cursor paginate the list and fields projects prevalence records.
+    """
+    current = wait_for_dataset(["Prevalence"])
+    if current is None:
+        return data_not_ready(["Prevalence"])
+    bodies = current["catalogue"]["bodies"]
     disease_type = request.args.get("type")
     reverse_order = request.args.get("reverse", "false").lower() == "true"
 
     if disease_type == "alphabetical":
-        diseases = sorted(fetched_data.get("Prevalence", pd.DataFrame()).get("Disease", []).dropna().unique())
-        return jsonify({"diseases": diseases})
+        if "alphabetical" not in bodies:
+            return jsonify({"diseases": []})
+        return catalogue_response(current, "alphabetical", request.args)
     elif disease_type == "prevalence":
-        # Fetch the Prevalence sheet and return Disease and Estimated prevalence(/100,000)
-        prevalence_df = fetched_data.get("Prevalence", pd.DataFrame())
-        if "Disease" not in prevalence_df.columns or "Estimated prevalence(/100,000)" not in prevalence_df.columns:
+        # Disease and Estimated prevalence(/100,000) records from the Prevalence sheet
+        key = "prevalence_reverse" if reverse_order else "prevalence"
+        if key not in bodies:
             return jsonify({"error": "Required columns not found in Prevalence sheet"}), 400
-        # Select only the Disease and Estimated prevalence(/100,000) columns
-        prevalence_data = prevalence_df[["Disease", "Estimated prevalence(/100,000)"]].dropna(subset=["Disease"])
-        # Convert to list of dictionaries
-        diseases = prevalence_data.to_dict('records')
-        if reverse_order:
-            diseases.reverse()
-        return jsonify({"diseases": diseases})
+        return catalogue_response(current, key, request.args)
     elif disease_type == "sheet_order":
-        diseases = fetched_data.get("Prevalence", pd.DataFrame()).get("Disease", []).dropna().tolist()
-        if reverse_order:
-            diseases.reverse()
-        return jsonify({"diseases": diseases})
+        key = "sheet_order_reverse" if reverse_order else "sheet_order"
+        if key not in bodies:
+            return jsonify({"diseases": []})
+        return catalogue_response(current, key, request.args)
     else:
         return jsonify({"error": "Invalid type"}), 400
 
 @app.route("/fetch_data", methods=["POST"])
 def fetch_data():
-    """Fetch data for a specific sheet when clicked, including AI Generated Data from DeepSeek via OpenRouter."""
-    global fetched_data
+    """Fetch data for a specific sheet when clicked, including AI Generated Data from DeepSeek via OpenRouter.
+
+    Optional limit/cursor paginate the records and fields (a list or comma-separated string)
+    keeps only the named columns.
+    """
     sheet_name = request.json.get("sheet_name")
     query = request.json.get("query", "").strip().lower().replace("\n", " ")
+    current = wait_for_dataset([sheet_name]) if sheet_name in SHEETS_TO_LOAD else dataset
+    if current is None:
+        return data_not_ready([sheet_name])
+    fetched_data = current["sheets"]
+    try:
+        offset, limit, fields = page_request(request.json, current["version"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def sheet_response(results):
+        """Page and project the sheet's records into the response."""
+        page, next_cursor = page_items(results, current["version"], offset, limit)
+        payload = {"sheet": sheet_name, "data": project(page, fields)}
+        if limit is not None:
+            payload["next_cursor"] = next_cursor
+        return payload
 
     if sheet_name == "AI Generated Data":
         if not deepseek_client:
             return jsonify({"error": "AI features are disabled. OPENROUTER_API_KEY is not configured."}), 500
-        prompt = f"Generate 10 concise lines of hypothetical data about the disease '{query.capitalize()}' " \
-                 f"including prevalence, symptoms, treatments, or research insights. Format each line as a sentence."
         try:
-            response = deepseek_client.chat.completions.create(
-                model="deepseek/deepseek-chat-v3.1",
-                messages=[
-                    {"role": "system", "content": "You are a medical data generator assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=300,
-                temperature=0.7
-            )
-            generated_text = response.choices[0].message.content.strip()
+            generated_text = complete_prompt(AI_DATA_PROMPT, query.capitalize()).strip()
             lines = generated_text.split("\n")[:10]
             if len(lines) < 10:
                 lines += ["No additional data available."] * (10 - len(lines))
             results = [{"AI Generated Data": line} for line in lines]
             results.append({"NOTE": "This data is generated by Deepseek V3 AI model"})
-            return jsonify({"sheet": sheet_name, "data": results})
+            return jsonify(sheet_response(results))
+        except LLMBusy:
+            return llm_busy()
         except Exception as e:
             return jsonify({"error": f"Failed to generate data: {str(e)}"}), 500
 
     elif sheet_name in fetched_data:
-        data = fetched_data[sheet_name]
-        if "Disease" in data.columns:
-            filtered = data[data["Disease"].str.lower().replace("\n", " ") == query]
-            results = filtered.to_dict(orient="records")
-            if not results:
-                return jsonify({"error": "No matching records found for this disease."}), 404
-            # Exclude specific column for Publications sheet
-            if sheet_name == "Publications":
-                for result in results:
-                    if "Number of Approximate Publications in Last Five Years (Searching in Title/Abstract on Pubmed)" in result:
-                        del result["Number of Approximate Publications in Last Five Years (Searching in Title/Abstract on Pubmed)"]
-            # Add note for Inheritance sheet
-            if sheet_name == "Inheritance":
-                results.append({
-                    "NOTE": "Not applicable is used for diseases that are not inherited. "
-                            "Unknown is applied when the mode of inheritance is not yet determined. "
-                            "Multigenic/multifactorial describes disorders where a combination of one or more genes "
-                            "and/or environmental factors contributes to the expression of the phenotype."
-                })
-            if sheet_name == "Prevalence":
-                results.append({"NOTE": "Without specification published figures are worldwide | An asterisk * indicates European data | BP indicates birth prevalence."})
-
-            # Format URLs as "Click Link" for specific sheets
-            if sheet_name in ["Biopharma Pipeline", "Publications", "Approved Treatments"]:
-                for result in results:
-                    for key, value in result.items():
-                        if isinstance(value, str):
-                            result[key] = format_urls_to_click_links(value)
-
-            return jsonify({"sheet": sheet_name, "data": results})
-        elif sheet_name == "Classification":
-            results = []
-            first_column = data.columns[0]
-            filtered = data[data[first_column].str.lower().replace("\n", " ") == query]
-            for index, row in filtered.iterrows():
-                result_entry = {"Disease": query.capitalize()}
-                for col in data.columns[1:]:
-                    if pd.notna(row[col]) and row[col] != "No details available":
-                        result_entry[col] = clean_text(str(row[col]))
-                results.append(result_entry)
-            if not results:
-                return jsonify({"error": "No matching records found in Classification."}), 404
-            return jsonify({"sheet": sheet_name, "data": results})
-        else:
-            return jsonify({"error": "No 'Disease' column found in sheet"}), 404
+        results, error = sheet_records(current, sheet_name, query)
+        if error:
+            return jsonify({"error": error}), 404
+        return jsonify(sheet_response(results))
     else:
         return jsonify({"error": "Sheet not found"}), 404
 
+@app.route("/api/disease/<path:name>", methods=["GET"])
+def disease_sheets(name):
+    """Every sheet's records for one disease in a single response (optional sheets=a,b subset).
+
+    Records match what /fetch_data returns per sheet; sheets where the disease has no
+    records map to an empty list. During the first load this answers once the first of the
+    sheets is parsed, listing the rest under pending_sheets with a Retry-After header.
+    """
+    sheets = request.args.get("sheets")
+    sheets = [sheet.strip() for sheet in sheets.split(",") if sheet.strip()] if sheets else list(SHEETS_TO_LOAD)
+    unknown = [sheet for sheet in sheets if sheet not in SHEETS_TO_LOAD]
+    if unknown:
+        return jsonify({"error": "Unknown sheets", "sheets": unknown}), 400
+
+    # Sheets are published in SHEETS_TO_LOAD order, so the earliest one requested comes in first
+    current = wait_for_dataset([min(sheets, key=SHEETS_TO_LOAD.index)] if sheets else None)
+    if current is None:
+        return data_not_ready(sheets)
+
+    query = name.replace("%20", " ").replace("%0A", "\n").strip().lower().replace("\n", " ")
+    disease_id = current["disease_ids"].get(normalize_disease_name(query))
+    if disease_id is None:
+        # The disease may only appear in sheets that are still loading
+        if not current["complete"]:
+            return data_not_ready(sheets)
+        return jsonify({"error": "No matching records found for this disease."}), 404
+
+    results = {}
+    for sheet_name in sheets:
+        if sheet_name in current["sheets"]:
+            records, _ = sheet_records(current, sheet_name, query, disease_id)
+            results[sheet_name] = records or []
+    missing = [sheet for sheet in sheets if sheet not in current["sheets"]]
+    pending = [] if current["complete"] else [sheet for sheet in missing if sheet not in current["failed_sheets"]]
+    unavailable = [sheet for sheet in missing if sheet not in pending]
+    response = jsonify({"query": query, "disease": current["disease_names"][disease_id], "sheets": results,
+                        "unavailable_sheets": unavailable, "pending_sheets": pending})
+    if pending:
+        return response, 200, {"Retry-After": str(RETRY_AFTER_SECONDS)}
+    return response
+
 @app.route("/fetch_data_stream", methods=["POST"])
 def fetch_data_stream():
     """Stream data for the AI Generated Data block."""
@@ -306,35 +1843,73 @@ def fetch_data_stream():
     if not deepseek_client:
         return jsonify({"error": "AI features are disabled. OPENROUTER_API_KEY is not configured."}), 400
 
-    prompt = f"Generate 10 concise lines of hypothetical data about the disease '{query.capitalize()}' " \
-             f"including prevalence, symptoms, treatments, or research insights. Format each line as a sentence."
+    try:
+        chunks, release = stream_prompt(AI_DATA_PROMPT, query.capitalize())
+    except LLMBusy:
+        return llm_busy()
 
     def generate_stream():
         try:
-            response = deepseek_client.chat.completions.create(
-                model="deepseek/deepseek-chat-v3.1",
-                messages=[
-                    {"role": "system", "content": "You are a medical data generator assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=300,
-                temperature=0.7,
-                stream=True
-            )
-            for chunk in response:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content.encode('utf-8')
+            for chunk in chunks:
+                yield chunk.encode('utf-8')
         except Exception as e:
             yield f"Error: Failed to generate data: {str(e)}".encode('utf-8')
 
-    return Response(stream_with_context(generate_stream()), content_type='text/plain; charset=utf-8')
+    response = Response(stream_with_context(generate_stream()), content_type='text/plain; charset=utf-8')
+    # The slot is held until the response is closed, even if the client leaves before the first chunk
+    response.call_on_close(release)
+    return response
+
+def pdf_render_busy():
+    """503 response for report requests that found no render slot in time."""
+    with pdf_cache_lock:
+        pdf_render_stats["rejected"] += 1
+    response = jsonify({"error": "Too many reports are being generated. Please retry shortly."})
+    return response, 503, {"Retry-After": str(RETRY_AFTER_SECONDS)}
 
 @app.route("/download/<path:query>", methods=["GET"])
 def download_pdf(query):
-    """Generate and download a PDF report for the searched disease in a hospital report format."""
-    global fetched_data
+    """Download the PDF report for the searched disease, rendering it on a cache miss."""
+    current = wait_for_dataset()
+    if current is None or current["pdf_items"] is None:
+        return data_not_ready()
     query = query.replace("%20", " ").replace("%0A", "\n").strip()
-    
+    disease_id = current["disease_ids"].get(normalize_disease_name(query))
+
+    # Reports of unknown names are not cached, so arbitrary queries cannot fill the cache
+    key = pdf_cache_key(current, disease_id, query.capitalize()) if disease_id is not None else None
+    body = pdf_cache_get(current["version"], key) if key else None
+    if body is None:
+        # Bound the documents held in memory at once instead of letting bursts pile up renders
+        if not pdf_render_slots.acquire(timeout=PDF_RENDER_WAIT_SECONDS):
+            return pdf_render_busy()
+        try:
+            body = render_report(current, query, disease_id)
+        finally:
+            pdf_render_slots.release()
+        if key:
+            pdf_cache_put(current["version"], key, body)
+    return pdf_response(body, report_filename(query))
+
+def report_sections(current, disease_id):
+    """(sheet name, PDF items of the disease's rows) for each report section, in sheet order."""
+    return [
+        (sheet_name, [items[position] for position in current["name_index"].get(sheet_name, {}).get(disease_id, [])])
+        for sheet_name, items in current["pdf_items"].items()
+    ]
+
+def render_report(current, query, disease_id):
+    """Render the PDF report for a disease in a hospital report format and return its bytes."""
+    return render_report_sections(query, report_sections(current, disease_id))
+
+def render_report_sections(query, sections):
+    """Render a report from its sections (see report_sections) and return its bytes.
+
+    Everything stays in memory; render time and report size are recorded in pdf_render_stats.
+    `flask benchmark-pdf` measures the traced peak memory per render.
+    """
+    start = time.perf_counter()
+
     # Initialize PDF with hospital report formatting
     pdf = FPDF()
     pdf.set_margins(left=10, top=10, right=10)  # Reduced margins to fit more content
@@ -350,7 +1925,9 @@ def download_pdf(query):
 
     # Report Title
     pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 8, f"Disease Report: {query.capitalize()}", ln=True, align="C")
+    # FPDF's core fonts are latin-1 only; other characters (e.g. en dashes in names) become "?"
+    title = query.capitalize().encode("latin-1", "replace").decode("latin-1")
+    pdf.cell(0, 8, f"Disease Report: {title}", ln=True, align="C")
     pdf.ln(5)
 
     # Add a horizontal line to separate header
@@ -358,34 +1935,16 @@ def download_pdf(query):
     pdf.line(10, pdf.get_y(), 200, pdf.get_y())
     pdf.ln(5)
 
-    # Define sheets to include (exclude AI Generated Data and Geographic Spread)
-    sheets_to_include = list(fetched_data.keys())
-
-    for sheet_name in sheets_to_include:
+    for sheet_name, results in sections:
         # Correct typo in sheet name comparison
         if sheet_name == "Publications":
             display_name = "Publications"
         else:
             display_name = sheet_name
 
-        data = fetched_data[sheet_name]
-        if "Disease" in data.columns:
-            filtered = data[data["Disease"].str.lower().replace("\n", " ") == query.lower()]
-            results = filtered.to_dict(orient="records")
-        elif sheet_name == "Classification":
-            filtered = pd.DataFrame(columns=data.columns)
-            first_column = data.columns[0]
-            filtered = data[data[first_column].str.lower().replace("\n", " ") == query.lower()]
-            results = []
-            for _, row in filtered.iterrows():
-                categories = [key for key, value in row.items() 
-                             if key != data.columns[0] 
-                             and pd.notna(value) 
-                             and value != "No details available"]
-                if categories:  # Only include if there are meaningful categories
-                    results.append(categories)
-        else:
-            continue
+        if sheet_name == "Classification":
+            # Only include rows with meaningful categories
+            results = [categories for categories in results if categories]
 
         if not results:
             continue  # Skip sections with no data
@@ -402,108 +1961,27 @@ def download_pdf(query):
                 pdf.multi_cell(0, 4, f"Categories: {categories_str}")
                 pdf.ln(2)
         else:
-            for result in results:
-                has_data = False
-                # For Biopharma Pipeline, treat each entry as a continuous list without "Unnamed" labels
-                if sheet_name == "Biopharma Pipeline":
-                    entries = []
-                    for col, val in result.items():
-                        if col == "Disease" or pd.isna(val) or val == "No details available" or col.startswith("Unnamed"):
-                            continue
-                        val = clean_text(str(val))
-                        val = format_text_for_pdf(val)
-                        entries.append((col, val))
-                    # Process unnamed columns as a continuous list
-                    unnamed_entries = []
-                    for col, val in result.items():
-                        if col.startswith("Unnamed"):
-                            val = clean_text(str(val))
-                            val = format_text_for_pdf(val)
-                            if val and val != "No details available":
-                                unnamed_entries.append(val)
-                    if entries or unnamed_entries:
-                        has_data = True
-                        for col, val in entries:
-                            pdf.cell(30, 4, f"{col}: ", ln=False)
-                            pdf.multi_cell(0, 4, val if val else "N/A")
-                        for entry in unnamed_entries:
-                            urls = extract_urls(entry)
-                            if urls:
-                                # If there are URLs, replace them with "Click Link" labels
-                                if len(urls) == 1:
-                                    # Single URL: "Click Link"
-                                    entry = re.sub(r'https?:\/\/\S+', '', entry).strip()
-                                    entry = truncate_text(entry, max_length=100)
-                                    if entry:
-                                        pdf.multi_cell(0, 4, entry + " ")
-                                    pdf.set_text_color(0, 0, 255)
-                                    pdf.cell(0, 4, "Click Link", ln=True, link=urls[0])
-                                    pdf.set_text_color(0, 0, 0)
-                                else:
-                                    # Multiple URLs: "Click Link1", "Click Link2", etc.
-                                    entry = re.sub(r'https?:\/\/\S+', '', entry).strip()
-                                    entry = truncate_text(entry, max_length=100)
-                                    if entry:
-                                        pdf.multi_cell(0, 4, entry + " ")
-                                    pdf.set_text_color(0, 0, 255)
-                                    for i, url in enumerate(urls, 1):
-                                        pdf.cell(0, 4, f"Click Link{i}" + (" " if i < len(urls) else ""), ln=(i == len(urls)), link=url)
-                                    pdf.set_text_color(0, 0, 0)
-                            else:
-                                entry = truncate_text(entry, max_length=100)
-                                pdf.multi_cell(0, 4, entry if entry else "N/A")
-                else:
-                    # Handle other sections
-                    for col, val in result.items():
-                        if col == "Disease" or pd.isna(val) or val == "No details available" or col == "NOTE":
-                            continue
-                        # Skip sections with only URLs and no other meaningful data
-                        if sheet_name in ["Publications", "Approved Treatments"]:
-                            urls = extract_urls(str(val))
-                            if urls and not re.sub(r'https?:\/\/\S+', '', str(val)).strip():
-                                continue
-                        has_data = True
-                        val = clean_text(str(val))
-                        val = format_text_for_pdf(val)
-                        # Special handling for sections with URLs
-                        if sheet_name in ["Publications", "Approved Treatments"]:
-                            urls = extract_urls(val)
-                            if urls:
-                                # If there are URLs, replace them with "Click Link" labels
-                                if len(urls) == 1:
-                                    # Single URL: "Click Link"
-                                    val = re.sub(r'https?:\/\/\S+', '', val).strip()
-                                    pdf.cell(30, 4, f"{col}: ", ln=False)
-                                    if val:
-                                        pdf.multi_cell(0, 4, val + " ")
-                                    pdf.set_text_color(0, 0, 255)
-                                    pdf.cell(0, 4, "Click Link", ln=True, link=urls[0])
-                                    pdf.set_text_color(0, 0, 0)
-                                else:
-                                    # Multiple URLs: "Click Link1", "Click Link2", etc.
-                                    val = re.sub(r'https?:\/\/\S+', '', val).strip()
-                                    pdf.cell(30, 4, f"{col}: ", ln=False)
-                                    if val:
-                                        pdf.multi_cell(0, 4, val + " ")
-                                    pdf.set_text_color(0, 0, 255)
-                                    for i, url in enumerate(urls, 1):
-                                        pdf.cell(0, 4, f"Click Link{i}" + (" " if i < len(urls) else ""), ln=(i == len(urls)), link=url)
-                                    pdf.set_text_color(0, 0, 0)
-                            else:
-                                # No URLs, render as normal
-                                val = truncate_text(val, max_length=100)
-                                pdf.cell(30, 4, f"{col}: ", ln=False)
-                                pdf.multi_cell(0, 4, val if val else "N/A")
+            for items in results:
+                for label, text, urls in items:
+                    # Biopharma Pipeline entries are a continuous list without labels
+                    if label is not None:
+                        pdf.cell(30, 4, f"{label}: ", ln=False)
+                    if urls:
+                        # If there are URLs, show them as "Click Link" labels
+                        if text:
+                            pdf.multi_cell(0, 4, text + " ")
+                        pdf.set_text_color(0, 0, 255)
+                        if len(urls) == 1:
+                            # Single URL: "Click Link"
+                            pdf.cell(0, 4, "Click Link", ln=True, link=urls[0])
                         else:
-                            # Special handling for prevalence to format numbers
-                            if col == "Estimated prevalence(/100,000)":
-                                try:
-                                    val = "{:,.2f}".format(float(val.replace(",", "")))
-                                except (ValueError, TypeError):
-                                    val = val if val else "N/A"
-                            pdf.cell(30, 4, f"{col}: ", ln=False)
-                            pdf.multi_cell(0, 4, val if val else "N/A")
-                if has_data:
+                            # Multiple URLs: "Click Link1", "Click Link2", etc.
+                            for i, url in enumerate(urls, 1):
+                                pdf.cell(0, 4, f"Click Link{i}" + (" " if i < len(urls) else ""), ln=(i == len(urls)), link=url)
+                        pdf.set_text_color(0, 0, 0)
+                    else:
+                        pdf.multi_cell(0, 4, text if text else "N/A")
+                if items:
                     pdf.ln(2)
 
             # Add notes if applicable
@@ -526,36 +2004,288 @@ def download_pdf(query):
     pdf.set_font("Arial", "I", 8)
     pdf.cell(0, 10, f"Generated on: May 14, 2025", ln=True, align="C")
 
-    pdf_file = f"{query.replace('/', '_')}_report.pdf"
-    pdf.output(pdf_file, "F")
-    return send_file(pdf_file, as_attachment=True)
-
-@app.route("/ask_bot", methods=["POST"])
-def ask_bot():
-    if not deepseek_client:
-        return jsonify({"answer": "AI chatbot is currently disabled. Please set OPENROUTER_API_KEY to enable AI features."})
-    
-    user_query = request.json.get("question", "").strip()
-    if not user_query:
-        return jsonify({"answer": "Please ask something about a rare disease."})
-
+    # FPDF 1.7 returns the document as a latin-1 str
+    body = pdf.output(dest="S").encode("latin-1")
+    with pdf_cache_lock:
+        pdf_render_stats["renders"] += 1
+        pdf_render_stats["max_render_ms"] = max(pdf_render_stats["max_render_ms"], round((time.perf_counter() - start) * 1000, 1))
+        pdf_render_stats["max_report_bytes"] = max(pdf_render_stats["max_report_bytes"], len(body))
+    return body
+
+
+def report_filename(query):
+    """File name a report for query is served or archived under."""
+    return f"{query.replace('/', '_')}_report.pdf"
+
+def render_report_task(query, sections):
+    """Process pool task: render one report from the sections the exporting process looked up."""
+    return render_report_sections(query, sections)
+
+def get_report_pool(workers=None):
+    """The shared report process pool and its size, created on first use."""
+    global report_pool, report_pool_workers
+    with report_pool_lock:
+        if report_pool is None:
+            report_pool_workers = workers or BULK_REPORT_WORKERS or available_cpus()
+            # Spawn rather than fork, as for sheet parsing: other threads may hold locks. Workers
+            # get each report's rows with its task, so they never load the dataset themselves.
+            report_pool = ProcessPoolExecutor(max_workers=report_pool_workers,
+                                              mp_context=multiprocessing.get_context("spawn"))
+        return report_pool, report_pool_workers
+
+def discard_report_pool(pool):
+    """Drop a broken report pool so the next export starts a new one."""
+    global report_pool
+    with report_pool_lock:
+        if report_pool is pool:
+            report_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def render_reports(current, queries, workers=None):
+    """Yield (query, report bytes or None) for each query, in completion order.
+
+    Cached reports are used as they are and rendered ones are added to the cache. Exports of up
+    to BULK_INPROCESS_REPORTS diseases are rendered in-process, and their callers hold one of
+    pdf_render_slots for the whole export. Larger ones go to the shared report pool with at most
+    two reports per pool process in flight, so memory stays bounded however many diseases are
+    requested; their callers hold a bulk_export_slots slot, which bounds the exports sharing
+    the pool.
+    """
+    version = current["version"]
+    missing = []
+    for query in queries:
+        disease_id = current["disease_ids"].get(normalize_disease_name(query))
+        key = pdf_cache_key(current, disease_id, query.capitalize()) if disease_id is not None else None
+        body = pdf_cache_get(version, key) if key else None
+        if disease_id is None or body is not None:
+            yield query, body
+        else:
+            missing.append((query, disease_id, key))
+    if len(queries) <= BULK_INPROCESS_REPORTS or workers == 1:
+        for query, disease_id, key in missing:
+            body = render_report(current, query, disease_id)
+            pdf_cache_put(version, key, body)
+            yield query, body
+        return
+    pool, pool_workers = get_report_pool(workers)
+    window = 2 * pool_workers
+    pending = {}
+    try:
+        for query, disease_id, key in missing:
+            future = pool.submit(render_report_task, query, report_sections(current, disease_id))
+            pending[future] = query, key
+            if len(pending) >= window:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    query, key = pending.pop(future)
+                    body = future.result()
+                    pdf_cache_put(version, key, body)
+                    yield query, body
+        for future in as_completed(list(pending)):
+            query, key = pending.pop(future)
+            body = future.result()
+            pdf_cache_put(version, key, body)
+            yield query, body
+    except BrokenProcessPool:
+        discard_report_pool(pool)
+        raise
+    finally:
+        # A client that leaves mid-export should not keep the pool busy for the next one
+        for future in pending:
+            future.cancel()
+
+class ZipStream(io.RawIOBase):
+    """Write-only, unseekable file that hands out what has been written since the last drain.
+
+    zipfile writes entries with data descriptors to unseekable files, so an archive can be
+    streamed entry by entry without holding it in memory.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def stream_report_zip(current, queries, workers=None):
+    """Yield a ZIP archive of the reports for queries chunk by chunk while they are rendered.
+
+    The archive ends with manifest.json listing the archived reports and the names not found.
+    """
+    stream = ZipStream()
+    manifest = {"data_version": current["version"], "reports": [], "not_found": []}
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_STORED) as archive:
+        for query, body in render_reports(current, queries, workers):
+            if body is None:
+                manifest["not_found"].append(query)
+                continue
+            filename = report_filename(query)
+            archive.writestr(filename, body)
+            manifest["reports"].append(filename)
+            yield stream.drain()
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+    yield stream.drain()
+
+@app.route("/api/reports", methods=["POST"])
+def bulk_reports():
+    """Stream a ZIP of PDF reports for a JSON list of disease names ({"diseases": [...]})."""
+    queries = (request.json or {}).get("diseases")
+    if not isinstance(queries, list) or not queries:
+        return jsonify({"error": "Expected a non-empty \"diseases\" list"}), 400
+    # Duplicates would only render the same report twice
+    queries = list(dict.fromkeys(str(query).strip() for query in queries if str(query).strip()))
+    if len(queries) > MAX_BULK_REPORTS:
+        return jsonify({"error": f"At most {MAX_BULK_REPORTS} diseases per request"}), 400
+
+    current = wait_for_dataset()
+    if current is None or current["pdf_items"] is None:
+        return data_not_ready()
+    # Small exports render in-process under one render slot, like a download; larger ones take
+    # turns with the report pool
+    if len(queries) <= BULK_INPROCESS_REPORTS:
+        if not pdf_render_slots.acquire(timeout=PDF_RENDER_WAIT_SECONDS):
+            return pdf_render_busy()
+        release = pdf_render_slots.release
+    else:
+        if not bulk_export_slots.acquire(timeout=PDF_RENDER_WAIT_SECONDS):
+            with pdf_cache_lock:
+                pdf_render_stats["rejected"] += 1
+            response = jsonify({"error": "Too many report exports are running. Please retry shortly."})
+            return response, 503, {"Retry-After": str(RETRY_AFTER_SECONDS)}
+        release = bulk_export_slots.release
+    response = Response(stream_with_context(stream_report_zip(current, queries)), mimetype="application/zip",
+                        headers={"Content-Disposition": 'attachment; filename="orphanatlas_reports.zip"'})
+    # Held until the archive is finished or the client leaves
+    response.call_on_close(release)
+    return response
+
+def canned_chat_answer(user_query):
+    """HTML answer to questions the chatbot answers without the AI, or None."""
     # Check for "I'm really chatting with a person" query
     if user_query.lower().strip() in ["i'm really chatting with a person", "im really chatting with a person", "am i chatting with a person"]:
         response_text = """
 I'm glad you feel that way! I'm OrphanAtlas Assistant, an AI designed to chat with you in a friendly and helpful way. I aim to make our conversation feel as natural as possible while providing you with accurate information about rare diseases. While I'm not a human, I'm here to assist you with a human touch! 😊<br><br>
 How can I help you today?
 """
-        html_answer = response_text.replace("\n", "<br>")
-        return jsonify({"answer": html_answer})
-
-    disease_count = 0
-    if "Prevalence" in fetched_data and "Disease" in fetched_data["Prevalence"].columns:
-        disease_count = fetched_data["Prevalence"]["Disease"].dropna().nunique()
+        return response_text.replace("\n", "<br>")
+    return None
+
+def estimate_tokens(text):
+    """Rough token count of text for prompt budgeting (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+def mention_trigrams(key):
+    """Character trigrams of a canonical name or question with word boundaries at both ends, in order."""
+    padded = f" {key} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+def mentioned_diseases(current, question, limit):
+    """Diseases a question names, best first: [(disease_id, score)].
+
+    The score is the share of a name's trigrams found in the question, so misspelled names
+    still count. Candidates come from the question's selective trigrams as in fuzzy_match.
+    Picked names use up the trigrams they matched, so a name that only matched within a
+    longer picked one ("Upington disease" in "Huntington disease") drops out, while a
+    repeated phrase can still back two names.
+    """
+    keys = current["disease_keys"]
+    # Sentence punctuation would otherwise hide the trigrams at the end of a name
+    grams = Counter(mention_trigrams(normalize_disease_name(re.sub(r'[?!;:"]|[.,](?=\s|$)', " ", question))))
+    postings = sorted((current["trigram_index"][gram] for gram in grams if gram in current["trigram_index"]), key=len)
+    common = max(1, int(len(keys) * FUZZY_COMMON_TRIGRAM_FRACTION))
+    counts = Counter()
+    for ids in [ids for ids in postings if len(ids) <= common] or postings[:3]:
+        counts.update(ids)
+
+    scored = []
+    for disease_id, _ in counts.most_common(FUZZY_MAX_CANDIDATES):
+        name_grams = mention_trigrams(keys[disease_id])
+        score = sum(gram in grams for gram in name_grams) / len(name_grams)
+        if score >= (CHAT_MENTION_MIN_SCORE if len(name_grams) >= 8 else 1.0):
+            scored.append((score, len(keys[disease_id]), disease_id))
+    scored.sort(reverse=True)
+    picked = []
+    for _, _, disease_id in scored:
+        name_grams = Counter(mention_trigrams(keys[disease_id]))
+        score = sum((grams & name_grams).values()) / sum(name_grams.values())
+        if score >= (CHAT_MENTION_MIN_SCORE if sum(name_grams.values()) >= 8 else 1.0):
+            picked.append((disease_id, round(score, 3)))
+            grams -= name_grams
+            if len(picked) >= limit:
+                break
+    return picked
+
+def chat_context(current, disease_ids, budget):
+    """Reference lines about diseases from CHAT_CONTEXT_SHEETS within budget estimated tokens.
+
+    Lines come disease by disease in sheet priority order, from the cleaned report content;
+    a line that no longer fits is skipped, so the context never exceeds the budget. Returns
+    (context, estimated tokens).
+    """
+    if current["pdf_items"] is None:
+        return "", 0
+    lines = []
+    used = 0
+    for disease_id in disease_ids:
+        # Diseases listed on several rows often repeat the same value
+        seen = set()
+        header = f"{current['disease_names'][disease_id]}:"
+        for sheet_name in CHAT_CONTEXT_SHEETS:
+            for position in current["name_index"].get(sheet_name, {}).get(disease_id, []):
+                for label, text, urls in current["pdf_items"][sheet_name][position]:
+                    text = " ".join(text.split())
+                    if label is None or label.startswith("Unnamed") or text in CHAT_PLACEHOLDERS:
+                        continue
+                    line = f"- {label.strip()}: {text}" + (f" {urls[0]}" if urls else "")
+                    if line in seen:
+                        continue
+                    seen.add(line)
+                    cost = estimate_tokens(line) + (estimate_tokens(header) if header else 0)
+                    if used + cost > budget:
+                        continue
+                    if header:
+                        lines.append(header)
+                        header = None
+                    lines.append(line)
+                    used += cost
+    return "\n".join(lines), used
+
+def chat_request(user_query):
+    """Keyword arguments of the chat completion answering a chatbot question, and its retrieval report.
+
+    The prompt is grounded in the dataset rows about the diseases the question names, packed
+    into CHAT_CONTEXT_TOKENS. The report lists those diseases, the retrieval time and the
+    estimated context and prompt tokens.
+    """
+    # The count is only context for the model, so don't hold the answer up for it
+    current = wait_for_dataset(["Prevalence"]) or dataset
+    disease_count = current["catalogue"]["disease_count"]
+
+    start = time.perf_counter()
+    mentions = mentioned_diseases(current, user_query, CHAT_MAX_DISEASES)
+    context, context_tokens = chat_context(current, [disease_id for disease_id, _ in mentions], CHAT_CONTEXT_TOKENS)
+    retrieval_ms = round((time.perf_counter() - start) * 1000, 2)
+    grounding = f"""
+Reference data from the OrphanAtlas database for this question:
+{context}
+
+Base your answer on this data where it applies, and say so when it does not cover the question.
+""" if context else ""
 
     prompt = f"""
 You are OrphanAtlas Assistant, a friendly, well-informed AI chatbot developed by Prashant Soni.
 Your database contains information on {disease_count} rare diseases.
-
+{grounding}
 If someone asks "who created you" or "who designed you", reply:
 "I was designed and developed by Prashant Soni, a passionate AI researcher and developer."
 
@@ -564,78 +2294,607 @@ Always respond with:
 - Bullet points
 - Clickable hyperlinks when possible
 - Structured text for readability
+- A short, focused answer
 
 User: {user_query}
 """
+    system = "You are a rare disease assistant that replies with clean HTML for the web."
+    prompt_tokens = estimate_tokens(system) + estimate_tokens(prompt)
+    with chat_context_lock:
+        chat_context_stats["requests"] += 1
+        chat_context_stats["grounded"] += bool(context)
+        chat_context_stats["retrieval_ms_total"] += retrieval_ms
+        chat_context_stats["max_retrieval_ms"] = max(chat_context_stats["max_retrieval_ms"], retrieval_ms)
+        chat_context_stats["prompt_tokens_total"] += prompt_tokens
+        chat_context_stats["max_prompt_tokens"] = max(chat_context_stats["max_prompt_tokens"], prompt_tokens)
+    completion = {
+        "model": LLM_MODEL,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": 500,
+        "temperature": 0.7,
+    }
+    retrieval = {
+        "diseases": [current["disease_names"][disease_id] for disease_id, _ in mentions],
+        "retrieval_ms": retrieval_ms,
+        "context_tokens": context_tokens,
+        "prompt_tokens": prompt_tokens,
+    }
+    return completion, retrieval
+
+def chat_flight_key(completion):
+    """Flight key of a chatbot completion, so identical questions asked at once share one call."""
+    return hashlib.sha256(json.dumps({"chat": completion}, sort_keys=True).encode("utf-8")).hexdigest()
+
+def chat_context_info():
+    """Chatbot retrieval counters and averages, for /health."""
+    with chat_context_lock:
+        stats = dict(chat_context_stats)
+    requests = stats.pop("requests")
+    return {
+        "requests": requests,
+        "grounded": stats["grounded"],
+        "context_token_budget": CHAT_CONTEXT_TOKENS,
+        "mean_retrieval_ms": round(stats["retrieval_ms_total"] / requests, 2) if requests else 0.0,
+        "max_retrieval_ms": stats["max_retrieval_ms"],
+        "mean_prompt_tokens": round(stats["prompt_tokens_total"] / requests) if requests else 0,
+        "max_prompt_tokens": stats["max_prompt_tokens"],
+    }
+
+def chat_question_key(question, diseases=()):
+    """Canonical form of a chatbot question for the answer cache: what it asks about the diseases it names.
+
+    Stopwords, filler and the words of those disease names are dropped. Rare disease names are
+    long, so left in they would outweigh the few words that say what is asked. What remains
+    is short, so plurals are folded ("treatments" as "treatment") to keep one letter from
+    deciding a match.
+    """
+    named = {word for name in diseases for word in TOKEN_PATTERN.findall(name.lower())}
+    return " ".join(word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+                    for word in TOKEN_PATTERN.findall(question.lower())
+                    if word not in FULLTEXT_STOPWORDS and word not in CHAT_FILLER_WORDS and word not in named)
+
+def chat_question_numbers(key):
+    """The numbers in a question key, which rephrasings must keep."""
+    return frozenset(word for word in key.split() if word.isdigit())
+
+def drop_chat_cache_entry(entry_key):
+    """Remove one answer cache entry and its bucket slot; the caller holds chat_cache_lock."""
+    del chat_cache[entry_key]
+    diseases, key = entry_key
+    chat_cache_buckets[diseases].discard(key)
+    if not chat_cache_buckets[diseases]:
+        del chat_cache_buckets[diseases]
+
+def chat_cache_get(question, diseases):
+    """Cached answer to the question or a rephrasing of it about the same diseases, as (answer, similarity).
+
+    Only questions naming the same diseases are compared, so the scan stays small and
+    "symptoms of Becker muscular dystrophy" never answers the Duchenne question. Similarity
+    is then measured on the rest of the question alone (an empty rest for "What is X?").
+    Numbers must match too, as subtypes ("type 1", "type 2") differ by a single character.
+    Returns (None, None) on a miss.
+    """
+    diseases = tuple(diseases)
+    key = chat_question_key(question, diseases)
+    if not CHAT_CACHE_MAX_ENTRIES or not (key or diseases):
+        return None, None
+    grams = name_trigrams(key)
+    numbers = chat_question_numbers(key)
+    now = time.time()
+    with chat_cache_lock:
+        best, best_similarity = None, 0.0
+        for other in list(chat_cache_buckets.get(diseases, ())):
+            entry = chat_cache[(diseases, other)]
+            if entry["created_at"] < now - CHAT_CACHE_TTL_SECONDS:
+                drop_chat_cache_entry((diseases, other))
+                continue
+            if entry["numbers"] != numbers:
+                continue
+            similarity = 1.0 if other == key else len(grams & entry["grams"]) / len(grams | entry["grams"])
+            if similarity > best_similarity:
+                best, best_similarity = other, similarity
+        if best is None or best_similarity < CHAT_CACHE_MIN_SIMILARITY:
+            chat_cache_stats["misses"] += 1
+            return None, None
+        chat_cache.move_to_end((diseases, best))
+        chat_cache_stats["hits" if best == key else "near_hits"] += 1
+        return chat_cache[(diseases, best)]["answer"], round(best_similarity, 3)
+
+def chat_cache_put(question, diseases, answer):
+    """Cache a formatted answer, evicting the least recently used entries beyond CHAT_CACHE_MAX_ENTRIES."""
+    key = chat_question_key(question, diseases)
+    if not CHAT_CACHE_MAX_ENTRIES or not (key or diseases):
+        return
+    entry_key = (tuple(diseases), key)
+    with chat_cache_lock:
+        if entry_key in chat_cache:
+            drop_chat_cache_entry(entry_key)
+        chat_cache[entry_key] = {"answer": answer, "grams": name_trigrams(key), "numbers": chat_question_numbers(key),
+                                 "created_at": time.time()}
+        chat_cache_buckets.setdefault(entry_key[0], set()).add(key)
+        chat_cache_stats["stores"] += 1
+        while len(chat_cache) > CHAT_CACHE_MAX_ENTRIES:
+            drop_chat_cache_entry(next(iter(chat_cache)))
+            chat_cache_stats["evictions"] += 1
+
+def chat_cache_info():
+    """Answer cache size, counters and hit rate, for /health."""
+    with chat_cache_lock:
+        lookups = chat_cache_stats["hits"] + chat_cache_stats["near_hits"] + chat_cache_stats["misses"]
+        hits = chat_cache_stats["hits"] + chat_cache_stats["near_hits"]
+        return {"entries": len(chat_cache), "max_entries": CHAT_CACHE_MAX_ENTRIES,
+                "min_similarity": CHAT_CACHE_MIN_SIMILARITY, "ttl_seconds": CHAT_CACHE_TTL_SECONDS,
+                **chat_cache_stats, "hit_rate": round(hits / lookups, 3) if lookups else 0.0}
+
+def format_chat_answer(text, first_link=None):
+    """Chatbot answer as HTML: line breaks, **bold** and URLs as "Click Link" labels.
+
+    Streamed segments pass first_link to number their links on from the previous segments,
+    as the total count that decides the labels is not known until the answer is complete.
+    """
+    html = text.replace("\n", "<br>")
+    html = BOLD_PATTERN.sub(r'<strong>\1</strong>', html)
+    if first_link is None:
+        return format_urls_to_click_links(html)
+    labels = iter(range(first_link, first_link + len(extract_urls(html))))
+    return URL_PATTERN.sub(lambda match: f'<a href="{match.group(0)}" target="_blank">Click Link{next(labels)}</a>', html)
+
+def chat_segment_end(text):
+    """Length of the longest prefix of a partial answer that formats the same on its own, or 0.
+
+    The prefix must end in a space or tab followed by more text, so it splits no URL and ends
+    in no trailing whitespace, and must contain every ** marker it opens with its closing one.
+    Markers are paired in the order the bold pattern pairs them.
+    """
+    markers = []
+    position = text.find("**")
+    while position != -1:
+        markers.append(position)
+        position = text.find("**", position + 2)
+    for match in reversed(list(CHAT_CUT_PATTERN.finditer(text))):
+        if bisect_left(markers, match.end()) % 2 == 0:
+            return match.end()
+    return 0
+
+def format_chat_stream(chunks):
+    """Yield a streamed chatbot answer as formatted HTML segments while its chunks arrive.
+
+    Concatenated, the segments match format_chat_answer of the whole answer except for link
+    labels, which are numbered as they appear.
+    """
+    pending = ""
+    links = 1
+    for chunk in chunks:
+        # Leading whitespace is dropped, as the whole answer is stripped
+        pending = pending + chunk if pending else chunk.lstrip()
+        end = chat_segment_end(pending)
+        if end:
+            html = format_chat_answer(pending[:end], links)
+            links += html.count("</a>")
+            pending = pending[end:]
+            yield html
+    if pending.rstrip():
+        yield format_chat_answer(pending.rstrip(), links)
+
+def sse_event(data, event=None):
+    """One server-sent event carrying data as JSON (which keeps it on a single data line)."""
+    return (f"event: {event}\n" if event else "") + f"data: {json.dumps(data)}\n\n"
 
-    try:
-        response = deepseek_client.chat.completions.create(
-            model="deepseek/deepseek-chat-v3.1",
-            messages=[
-                {"role": "system", "content": "You are a rare disease assistant that replies with clean HTML for the web."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=500,
-            temperature=0.7
-        )
+@app.route("/ask_bot", methods=["POST"])
+def ask_bot():
+    if not deepseek_client:
+        return jsonify({"answer": "AI chatbot is currently disabled. Please set OPENROUTER_API_KEY to enable AI features."})
+    
+    user_query = request.json.get("question", "").strip()
+    if not user_query:
+        return jsonify({"answer": "Please ask something about a rare disease."})
 
-        if response and response.choices and response.choices[0].message:
-            raw_answer = response.choices[0].message.content.strip()
-        else:
+    canned_answer = canned_chat_answer(user_query)
+    if canned_answer is not None:
+        return jsonify({"answer": canned_answer})
+
+    completion, retrieval = chat_request(user_query)
+    cached_answer, similarity = chat_cache_get(user_query, retrieval["diseases"])
+    if cached_answer is not None:
+        return jsonify({"answer": cached_answer, "retrieval": retrieval, "cache": {"similarity": similarity}})
+
+    try:
+        # Like the cached prompts, the call runs as a flight on the LLM pool under its caps
+        chunks, release = open_llm_stream(chat_flight_key(completion), completion, cache=False)
+    except LLMBusy:
+        return llm_busy(answer="The assistant is busy right now. Please try again in a few seconds.")
+    try:
+        raw_answer = "".join(chunks).strip()
+        if not raw_answer:
             return jsonify({"answer": "Sorry, I couldn't generate a response. Please try again."})
 
         # Format URLs in the chatbot response
-        html_answer = raw_answer.replace("\n", "<br>")
-        html_answer = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html_answer)
-        html_answer = format_urls_to_click_links(html_answer)
-
-        return jsonify({"answer": html_answer})
+        html_answer = format_chat_answer(raw_answer)
+        chat_cache_put(user_query, retrieval["diseases"], html_answer)
+        return jsonify({"answer": html_answer, "retrieval": retrieval})
 
     except Exception as e:
         return jsonify({"answer": f"Error: {str(e)}"})
+    finally:
+        release()
+
+@app.route("/ask_bot_stream", methods=["POST"])
+def ask_bot_stream():
+    """Stream the chatbot answer as server-sent events while it is generated.
+
+    Each message event carries the next formatted HTML segment ({"html": ...}); a final "done"
+    event carries the whole answer formatted as /ask_bot returns it ({"answer": ...}), which
+    the client shows in place of the segments. Cached answers come as the "done" event alone.
+    Failures end the stream with an "error" event.
+    """
+    user_query = (request.json or {}).get("question", "").strip()
+    if not deepseek_client:
+        answer = "AI chatbot is currently disabled. Please set OPENROUTER_API_KEY to enable AI features."
+    elif not user_query:
+        answer = "Please ask something about a rare disease."
+    else:
+        answer = canned_chat_answer(user_query)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if answer is not None:
+        return Response(sse_event({"answer": answer}, "done"), mimetype="text/event-stream", headers=headers)
+
+    completion, retrieval = chat_request(user_query)
+    cached_answer, similarity = chat_cache_get(user_query, retrieval["diseases"])
+    if cached_answer is not None:
+        return Response(sse_event({"answer": cached_answer, "retrieval": retrieval, "cache": {"similarity": similarity}}, "done"),
+                        mimetype="text/event-stream", headers=headers)
+    try:
+        chunks, release = open_llm_stream(chat_flight_key(completion), completion, cache=False)
+    except LLMBusy:
+        return llm_busy(answer="The assistant is busy right now. Please try again in a few seconds.")
+
+    def generate_events():
+        raw_answer = []
+
+        def tokens():
+            for chunk in chunks:
+                raw_answer.append(chunk)
+                yield chunk
+
+        try:
+            for html in format_chat_stream(tokens()):
+                yield sse_event({"html": html})
+            answer = "".join(raw_answer).strip()
+            if not answer:
+                yield sse_event({"answer": "Sorry, I couldn't generate a response. Please try again."}, "error")
+                return
+            html_answer = format_chat_answer(answer)
+            chat_cache_put(user_query, retrieval["diseases"], html_answer)
+            yield sse_event({"answer": html_answer, "retrieval": retrieval}, "done")
+        except Exception as e:
+            yield sse_event({"answer": f"Error: {str(e)}"}, "error")
+
+    response = Response(stream_with_context(generate_events()), mimetype="text/event-stream", headers=headers)
+    # The slot is held until the response is closed, even if the client leaves before the first event
+    response.call_on_close(release)
+    return response
 
 @app.route("/get_disease_count")
 def get_disease_count():
     """Return the total number of unique diseases from the Prevalence sheet."""
-    global fetched_data
-    if "Prevalence" in fetched_data and "Disease" in fetched_data["Prevalence"].columns:
-        count = fetched_data["Prevalence"]["Disease"].dropna().nunique()
-        return jsonify({"count": count})
+    current = wait_for_dataset(["Prevalence"])
+    if current is None:
+        return data_not_ready(["Prevalence"])
+    if "count" in current["catalogue"]["bodies"]:
+        return catalogue_response(current, "count")
     return jsonify({"count": 0, "error": "Prevalence sheet or Disease column not found"}), 404
 
+def normalize_place_name(name):
+    """Canonical form used to match country names: ASCII lowercase words, without a leading "the"
+    or parenthesised qualifiers such as "Finland (Finnish heritage)"."""
+    text = unicodedata.normalize("NFKD", re.sub(r"\([^)]*\)", " ", str(name))).encode("ascii", "ignore").decode("ascii")
+    key = " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+    return key[4:] if key.startswith("the ") else key
+
+def load_gazetteer(path):
+    """Countries as (iso2, name, latitude, longitude) and their names and aliases for matching.
+
+    keys lists every canonical name and alias, key_countries the country each one belongs to,
+    and trigram_index indexes keys for fuzzy matching as the disease names are.
+    """
+    countries = []
+    key_countries = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            country_id = len(countries)
+            countries.append((row["iso2"], row["name"], float(row["latitude"]), float(row["longitude"])))
+            for alias in [row["name"], *row["aliases"].split("|")]:
+                if alias:
+                    key_countries.setdefault(normalize_place_name(alias), country_id)
+    keys = list(key_countries)
+    return {
+        "countries": countries,
+        "key_countries": key_countries,
+        "keys": keys,
+        "trigram_index": build_trigram_index(keys),
+    }
+
+def get_gazetteer():
+    """The country gazetteer, loaded on first use."""
+    global gazetteer
+    with geographic_lock:
+        if gazetteer is None:
+            gazetteer = load_gazetteer(GAZETTEER_PATH)
+        return gazetteer
+
+def resolve_country(name):
+    """Gazetteer ID of a free-text country name (exact alias, else close trigram match), or None.
+
+    Regions in NON_COUNTRY_PLACES never resolve. fuzzy_match only gathers the candidates, which
+    are then ranked by the Jaccard overlap of their trigrams with the name.
+    """
+    places = get_gazetteer()
+    key = normalize_place_name(name)
+    if key in places["key_countries"]:
+        return places["key_countries"][key]
+    if not key or key in NON_COUNTRY_PLACES:
+        return None
+    grams = name_trigrams(key)
+    best_score, best_id = 0.0, None
+    for name_id, _ in fuzzy_match(places["keys"], places["trigram_index"], key, FUZZY_MAX_CANDIDATES):
+        candidate = name_trigrams(places["keys"][name_id])
+        score = len(grams & candidate) / len(grams | candidate)
+        if score > best_score:
+            best_score, best_id = score, name_id
+    if best_score >= COUNTRY_MIN_SCORE:
+        return places["key_countries"][places["keys"][best_id]]
+    return None
+
+def split_countries(text):
+    """Country names from an AI answer listing them separated by commas or lines (numbering dropped).
+
+    Commas inside parenthesised qualifiers do not split a name.
+    """
+    names = (re.sub(r"^\d+[.)]\s*", "", part.strip()) for part in re.split(r",(?![^(]*\))|\n", text))
+    return [name.strip().rstrip(".") for name in names if name.strip().rstrip(".")]
+
+def spread_prompt_fingerprint():
+    """Hash of the model and spread prompt a precomputed table was generated with."""
+    return llm_cache_key(GEOGRAPHIC_SPREAD_PROMPT, "")
+
+def get_geographic_spread_table():
+    """Precomputed country names by canonical disease name, loaded on first use.
+
+    A table generated with another model or prompt is ignored, so every disease falls back
+    to live calls until `flask precompute-spread` is run again.
+    """
+    global geographic_spread
+    with geographic_lock:
+        if geographic_spread is None:
+            geographic_spread = {}
+            if os.path.exists(GEOGRAPHIC_SPREAD_PATH):
+                try:
+                    with open(GEOGRAPHIC_SPREAD_PATH, encoding="utf-8") as f:
+                        table = json.load(f)
+                    if table.get("prompt") == spread_prompt_fingerprint():
+                        geographic_spread = table["diseases"]
+                    else:
+                        print(f"✗ Ignoring '{GEOGRAPHIC_SPREAD_PATH}': generated with another model or prompt")
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"✗ Ignoring unreadable '{GEOGRAPHIC_SPREAD_PATH}': {e}")
+        return geographic_spread
+
+def save_geographic_spread_table(diseases):
+    """Write the precomputed spread table atomically, tagged with the prompt it was generated with."""
+    tmp_path = f"{GEOGRAPHIC_SPREAD_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"prompt": spread_prompt_fingerprint(), "model": LLM_MODEL, "generated_at": time.time(),
+                   "diseases": diseases}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, GEOGRAPHIC_SPREAD_PATH)
+
+def geographic_spread_info():
+    """Precomputed table size and where spreads were served from, for /health."""
+    table = get_geographic_spread_table()
+    with geographic_lock:
+        return {"precomputed_diseases": len(table), **geographic_spread_stats}
+
+def spread_response(countries, source):
+    """Response body for a list of country names: each resolved once, with its centroid.
+
+    locations keeps every name for display (canonical where resolved), coordinates only those
+    that could be placed and unresolved the rest.
+    """
+    places = get_gazetteer()
+    locations, coordinates, unresolved = [], [], []
+    seen = set()
+    for country in countries:
+        country_id = resolve_country(country)
+        if country_id is None:
+            locations.append(country)
+            unresolved.append(country)
+        elif country_id not in seen:
+            seen.add(country_id)
+            iso2, name, latitude, longitude = places["countries"][country_id]
+            locations.append(name)
+            coordinates.append({"name": name, "iso2": iso2, "latitude": latitude, "longitude": longitude})
+    return {"locations": locations, "coordinates": coordinates, "unresolved": unresolved, "source": source}
+
 @app.route("/get_geographic_spread", methods=["POST"])
 def get_geographic_spread():
-    """Returns a JSON list of predicted countries where the disease is most common, generated via DeepSeek model."""
+    """Countries where the disease is most common with their centroids, precomputed or generated via DeepSeek model."""
+    query = request.json.get("query", "").strip()
+    countries = get_geographic_spread_table().get(normalize_disease_name(query))
+    if countries is not None:
+        with geographic_lock:
+            geographic_spread_stats["precomputed"] += 1
+        return jsonify(spread_response(countries, "precomputed"))
+
     if not deepseek_client:
         return jsonify({"error": "AI features are disabled. OPENROUTER_API_KEY is not configured.", "locations": []})
     
     try:
-        query = request.json.get("query", "").strip()
-        prompt = f"List 10 countries where the disease '{query}' is most commonly found based on prevalence. Respond only with the country names separated by commas."
-
-        response = deepseek_client.chat.completions.create(
-            model="deepseek/deepseek-chat-v3.1",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that outputs only country names."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=100,
-            temperature=0.5
-        )
-
-        if response and response.choices and hasattr(response.choices[0], "message"):
-            text = response.choices[0].message.content
-            countries = [c.strip() for c in re.split(r",|\n", text) if c.strip()]
-            return jsonify({"locations": countries})
-
-        return jsonify({"locations": []})
+        text = complete_prompt(GEOGRAPHIC_SPREAD_PROMPT, query)
+        with geographic_lock:
+            geographic_spread_stats["live"] += 1
+        return jsonify(spread_response(split_countries(text), "live"))
+    except LLMBusy:
+        return llm_busy(locations=[])
     except Exception as e:
         return jsonify({"error": str(e), "locations": []})
 
+def misspell(text, rng):
+    """Apply one random deletion, transposition or substitution to text."""
+    if len(text) < 4:
+        return text
+    i = rng.randrange(1, len(text) - 2)
+    edit = rng.choice(["delete", "swap", "replace"])
+    if edit == "delete":
+        return text[:i] + text[i + 1:]
+    if edit == "swap":
+        return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    return text[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + text[i + 1:]
+
+@app.cli.command("benchmark-search")
+@click.option("--scale", default=10, help="Also benchmark a synthetic catalogue this many times larger.")
+@click.option("--queries", default=500, help="Number of misspelled queries per run.")
+def benchmark_search(scale, queries):
+    """Benchmark fuzzy name search at the full catalogue size and at a synthetic multiple of it."""
+    fetch_diseases()
+    base_keys = dataset["disease_keys"]
+    rng = random.Random(0)
+    for factor in sorted({1, scale}):
+        # Synthetic copies get a distinct suffix so every name stays unique
+        keys = base_keys + [f"{key} variant {copy}" for copy in range(1, factor) for key in base_keys]
+        start = time.perf_counter()
+        trigram_index = build_trigram_index(keys)
+        build_ms = (time.perf_counter() - start) * 1000
+        timings = []
+        hits = 0
+        for name_id in rng.sample(range(len(base_keys)), min(queries, len(base_keys))):
+            query = misspell(base_keys[name_id], rng)
+            start = time.perf_counter()
+            matches = fuzzy_match(keys, trigram_index, query, DEFAULT_SUGGESTIONS)
+            timings.append((time.perf_counter() - start) * 1000)
+            hits += any(match_id == name_id for match_id, _ in matches)
+        timings.sort()
+        click.echo(
+            f"{len(keys)} names: index built in {build_ms:.0f} ms ({len(trigram_index)} trigrams); "
+            f"query p50 {statistics.median(timings):.2f} ms, p95 {timings[int(len(timings) * 0.95)]:.2f} ms, "
+            f"max {timings[-1]:.2f} ms; recall@{DEFAULT_SUGGESTIONS} {hits / len(timings):.1%}"
+        )
+
+# Phrasings per intent for `flask check-chat-cache`: each must reuse its own intent's answer only
+CHAT_CACHE_CHECK_INTENTS = {
+    "overview": ["What is {}?", "Tell me about {}", "what's {}"],
+    "symptoms": ["Symptoms of {}", "What are the symptoms of {}?"],
+    "treatment": ["Treatment for {}", "treatments for {}?"],
+    "inheritance": ["Is {} inherited?"],
+    "prevalence": ["How common is {}?"],
+}
+
+@app.cli.command("check-chat-cache")
+@click.option("--diseases", default=50, help="Number of the longest disease names to check.")
+def check_chat_cache(diseases):
+    """Check that rephrasings of a question about a long disease name hit its cached answer, and no other."""
+    fetch_diseases()
+    names = sorted(dataset["disease_names"], key=len, reverse=True)[:diseases]
+    wrong, missed = [], 0
+    for name in names:
+        mentioned = [dataset["disease_names"][disease_id] for disease_id, _ in mentioned_diseases(dataset, name, CHAT_MAX_DISEASES)]
+        # With only one intent's answer cached, every other intent must miss
+        for cached_intent, cached_phrasings in CHAT_CACHE_CHECK_INTENTS.items():
+            with chat_cache_lock:
+                chat_cache.clear()
+                chat_cache_buckets.clear()
+            chat_cache_put(cached_phrasings[0].format(name), mentioned, cached_intent)
+            for intent, phrasings in CHAT_CACHE_CHECK_INTENTS.items():
+                for phrasing in phrasings:
+                    answer, similarity = chat_cache_get(phrasing.format(name), mentioned)
+                    if answer is None and intent == cached_intent:
+                        missed += 1
+                    elif answer is not None and intent != cached_intent:
+                        wrong.append(f"{phrasing.format(name)!r} got the {answer} answer ({similarity})")
+    for line in wrong:
+        click.echo(f"✗ {line}")
+    checked = len(names) * len(CHAT_CACHE_CHECK_INTENTS) * sum(len(phrasings) for phrasings in CHAT_CACHE_CHECK_INTENTS.values())
+    click.echo(f"{checked} lookups about {len(names)} diseases: {len(wrong)} wrong answers, {missed} missed rephrasings.")
+    if wrong:
+        raise SystemExit(1)
+
+@app.cli.command("export-reports")
+@click.argument("names", type=click.File("r"))
+@click.option("--output", "-o", default="reports.zip", type=click.Path(dir_okay=False), help="ZIP file to write.")
+@click.option("--workers", default=0, help="Report processes (default: BULK_REPORT_WORKERS or one per core).")
+def export_reports(names, output, workers):
+    """Render PDF reports for the disease names in NAMES (one per line, - for stdin) into a ZIP."""
+    queries = list(dict.fromkeys(line.strip() for line in names if line.strip()))
+    fetch_diseases()
+    start = time.perf_counter()
+    with open(output, "wb") as f:
+        for chunk in stream_report_zip(dataset, queries, workers or None):
+            f.write(chunk)
+    click.echo(f"Wrote {len(queries)} requested reports to {output} in {time.perf_counter() - start:.1f} s.")
+
+@app.cli.command("precompute-spread")
+@click.option("--limit", default=0, help="Only generate this many missing diseases (default: all).")
+@click.option("--refresh", is_flag=True, help="Regenerate diseases already in the table.")
+def precompute_spread(limit, refresh):
+    """Fill the geographic spread table for every disease in the catalogue, resuming where it stopped."""
+    if not deepseek_client:
+        raise click.ClickException("OPENROUTER_API_KEY is not configured.")
+    fetch_diseases()
+    table = {} if refresh else dict(get_geographic_spread_table())
+    missing = [(key, name) for key, name in zip(dataset["disease_keys"], dataset["disease_names"]) if key not in table]
+    if limit:
+        missing = missing[:limit]
+    click.echo(f"Generating {len(missing)} diseases ({len(table)} already in '{GEOGRAPHIC_SPREAD_PATH}')...")
+    start = time.perf_counter()
+    failed = 0
+    # As many calls at once as a worker allows; each holds one of its slots
+    with ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENT) as pool:
+        futures = {pool.submit(complete_prompt, GEOGRAPHIC_SPREAD_PROMPT, name): key for key, name in missing}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                table[futures[future]] = split_countries(future.result())
+            except Exception as e:
+                failed += 1
+                click.echo(f"✗ {futures[future]}: {e}")
+            # Save as it goes so an interrupted run resumes instead of starting over
+            if done % 100 == 0:
+                save_geographic_spread_table(table)
+    save_geographic_spread_table(table)
+    names = [name for countries in table.values() for name in countries]
+    resolved = sum(resolve_country(name) is not None for name in names)
+    click.echo(
+        f"Wrote {len(table)} diseases to '{GEOGRAPHIC_SPREAD_PATH}' in {time.perf_counter() - start:.1f} s "
+        f"({failed} failed); {resolved / max(len(names), 1):.1%} of country names resolve to coordinates."
+    )
+
+@app.cli.command("benchmark-pdf")
+@click.option("--reports", default=50, help="Number of diseases to render reports for.")
+def benchmark_pdf(reports):
+    """Measure render time, report size and traced peak memory of PDF reports."""
+    fetch_diseases()
+    rng = random.Random(0)
+    disease_ids = rng.sample(range(len(dataset["disease_keys"])), min(reports, len(dataset["disease_keys"])))
+    timings, sizes, peaks = [], [], []
+    for disease_id in disease_ids:
+        tracemalloc.start()
+        start = time.perf_counter()
+        body = render_report(dataset, dataset["disease_names"][disease_id], disease_id)
+        timings.append((time.perf_counter() - start) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        sizes.append(len(body))
+    timings.sort()
+    click.echo(
+        f"{len(timings)} reports: render p50 {statistics.median(timings):.1f} ms, p95 {timings[int(len(timings) * 0.95)]:.1f} ms; "
+        f"size median {statistics.median(sizes) / 1024:.1f} KiB, max {max(sizes) / 1024:.1f} KiB; "
+        f"traced peak median {statistics.median(peaks) / 1024:.0f} KiB, max {max(peaks) / 1024:.0f} KiB"
+    )
+
 if __name__ == "__main__":
-    # Preload data on startup to avoid cold start delays
+    # Load data in the background so the server answers probes while sheets are parsed
     print("\n🚀 Starting OrphanAtlas API Server...")
-    fetch_diseases()
+    start_background_load()
     print("✓ Server ready to accept requests!\n")
     
     port = int(os.environ.get("PORT", 8080))
@@ -0,0 +1,41 @@
+"""Gunicorn settings for the OrphanAtlas API.
+
+The dataset is loaded once in the master before workers are forked, so every
+worker shares the parsed sheets copy-on-write instead of parsing its own copy.
+Workers use gthread, so a slow LLM call holds one thread rather than the
+whole worker and dataset lookups keep being served alongside it.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+
+# Processes per instance; each holds its own copy of anything written after fork
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+# Requests served concurrently per worker; app.py keeps LLM_RESERVED_THREADS of them out of
+# reach of requests waiting on AI calls
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+# LLM calls can take tens of seconds
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+
+# Import the app in the master so the dataset can be loaded before forking
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+
+
+def when_ready(server):
+    """Load the dataset in the master so forked workers inherit it."""
+    if not preload_app:
+        return
+    import app
+    app.fetch_diseases()
+    # Keep the garbage collector from touching (and so copying) the shared pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Threads do not survive fork, so each worker starts its own loader (when the
+    master did not preload the dataset) and its own workbook watcher."""
+    import app
+    app.start_background_load()
+    app.start_reload_watcher()